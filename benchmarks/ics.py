@@ -0,0 +1,76 @@
+"""
+Benchmark of the fast VEVENT extractor against the full icalendar parse.
+Runs over the recorded .ics fixtures, the paths given as arguments or, when
+there are none, a synthetic month.
+"""
+
+import sys
+import tempfile
+import timeit
+from pathlib import Path
+
+from elcairo.api.elcairo import CalEvent
+from elcairo.api.ics import parse_events
+from tests.utils.ics import event_summary, fixture_paths, read_ics, synthetic_month
+
+REPEAT = 20
+
+
+def check_parity(path: Path) -> int:
+    """Assert both parsers read the same events, returns how many."""
+    text: str = path.read_text()
+    full: dict[str, tuple] = {
+        summary[0]: summary
+        for summary in (
+            event_summary(CalEvent(component))
+            for component in read_ics(path).walk("VEVENT")
+        )
+    }
+    fast: dict[str, tuple] = {
+        summary[0]: summary
+        for summary in (
+            event_summary(CalEvent(component)) for component in parse_events(text)
+        )
+    }
+    assert fast == full, f"{path}: the parsers disagree"
+    return len(fast)
+
+
+def bench(path: Path) -> None:
+    """Print the parse time of both parsers over a calendar."""
+    events: int = check_parity(path)
+    text: str = path.read_text()
+
+    def full_parse() -> None:
+        for component in read_ics(path).walk("VEVENT"):
+            _ = CalEvent(component).content_hash
+
+    def fast_parse() -> None:
+        for component in parse_events(text):
+            _ = CalEvent(component).content_hash
+
+    full: float = timeit.timeit(full_parse, number=REPEAT) / REPEAT
+    fast: float = timeit.timeit(fast_parse, number=REPEAT) / REPEAT
+    print(
+        f"{path.name}: {events} events, "
+        f"icalendar {full * 1000:.2f} ms, "
+        f"extractor {fast * 1000:.2f} ms, "
+        f"{full / fast:.1f}x"
+    )
+
+
+def main() -> None:
+    paths: list[Path] = [Path(arg) for arg in sys.argv[1:]] or fixture_paths()
+    if paths:
+        for path in paths:
+            bench(path)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = Path(tmp_dir) / "synthetic.ics"
+        path.write_text(synthetic_month())
+        bench(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark of the targeted event page parser against a full BeautifulSoup
+tree, checking first that both extract the same information.
+Runs over the recorded event pages, the paths given as arguments or, when
+there are none, a synthetic page.
+"""
+
+import sys
+import timeit
+from pathlib import Path
+
+import bs4
+
+from elcairo.api.elcairo import ElCairo
+from elcairo.api.page import extract_sections
+from tests.utils.html import EDGE_CASES, fixture_pages, synthetic_page
+
+REPEAT = 50
+
+
+def soup_scrape(html: str) -> dict:
+    """Information of a page read from the complete tree."""
+    soup = bs4.BeautifulSoup(html, "html.parser")
+    return {
+        "synopsis": ElCairo.get_synopsis(soup),
+        "cost": ElCairo.get_cost(soup),
+        "extra_info": ElCairo.get_extra_info(soup),
+    }
+
+
+def targeted_scrape(html: str) -> dict:
+    """Information of a page read with the targeted parser."""
+    sections = extract_sections(html)
+    return {
+        "synopsis": sections.synopsis,
+        "cost": sections.cost,
+        "extra_info": ElCairo.extra_info_from_text(sections.extra_info),
+    }
+
+
+def check_parity(name: str, html: str) -> None:
+    """Assert both parsers read the same information of a page."""
+    assert targeted_scrape(html) == soup_scrape(html), f"{name}: the parsers disagree"
+    assert extract_sections(html).extra_info == soup_extra_info_text(html), name
+
+
+def soup_extra_info_text(html: str) -> str:
+    """Text of the extra info section in the complete tree."""
+    elem = bs4.BeautifulSoup(html, "html.parser").select_one(".ficha-tecnica-online")
+    return elem.text if elem is not None else ""
+
+
+def bench(name: str, html: str) -> None:
+    """Print the parse time of both parsers over a page."""
+    check_parity(name, html)
+    soup: float = timeit.timeit(lambda: soup_scrape(html), number=REPEAT) / REPEAT
+    targeted: float = (
+        timeit.timeit(lambda: targeted_scrape(html), number=REPEAT) / REPEAT
+    )
+    print(
+        f"{name}: {len(html) / 1024:.0f} KiB, "
+        f"BeautifulSoup {soup * 1000:.2f} ms, "
+        f"targeted {targeted * 1000:.2f} ms, "
+        f"{soup / targeted:.1f}x"
+    )
+
+
+def main() -> None:
+    for index, html in enumerate(EDGE_CASES):
+        check_parity(f"edge case {index}", html)
+
+    paths: list[Path] = [Path(arg) for arg in sys.argv[1:]] or fixture_pages()
+    if paths:
+        for path in paths:
+            bench(path.name, path.read_text())
+        return
+
+    bench("synthetic page", synthetic_page())
+
+
+if __name__ == "__main__":
+    main()
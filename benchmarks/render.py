@@ -0,0 +1,69 @@
+"""Micro-benchmark of the builtin ASCII renderer."""
+
+import tempfile
+import timeit
+from pathlib import Path
+
+from PIL import Image
+
+from elcairo.commands.lib.events_printer import (
+    ASCII_RAMP,
+    WIDTH,
+    builtin_ascii_render,
+)
+
+REPEAT = 20
+
+
+def pixel_loop_render(image_path: str) -> str:
+    """The previous implementation, one getpixel call per character."""
+    img = Image.open(image_path).convert("RGB")
+    char_height = max(1, int(WIDTH * img.height / img.width * 0.45))
+    gray = img.resize((WIDTH, char_height)).convert("L")
+
+    out = ""
+    for y in range(char_height):
+        row = ""
+        for x in range(WIDTH):
+            pixel = gray.getpixel((x, y))
+            row += ASCII_RAMP[int(pixel / 255 * (len(ASCII_RAMP) - 1))]
+        out += f"{row}\n"
+    return out
+
+
+def poster(directory: Path) -> str:
+    """Write a 600x900 gradient poster and return its path."""
+    img = Image.linear_gradient("L").resize((600, 900)).convert("RGB")
+    path = directory / "poster.jpeg"
+    img.save(path)
+    return str(path)
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        image_path = poster(Path(tmp_dir))
+        assert builtin_ascii_render(image_path) == pixel_loop_render(image_path)
+
+        results: dict[str, float] = {
+            "pixel loop": timeit.timeit(
+                lambda: pixel_loop_render(image_path), number=REPEAT
+            ),
+            "lookup table": timeit.timeit(
+                lambda: builtin_ascii_render(image_path), number=REPEAT
+            ),
+            "half blocks": timeit.timeit(
+                lambda: builtin_ascii_render(image_path, color=True), number=REPEAT
+            ),
+            "truecolor": timeit.timeit(
+                lambda: builtin_ascii_render(image_path, color=True, truecolor=True),
+                number=REPEAT,
+            ),
+        }
+
+    for name, seconds in results.items():
+        print(f"{name:>12}: {seconds / REPEAT * 1000:8.2f} ms per poster")
+    print(f"     speedup: {results['pixel loop'] / results['lookup table']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
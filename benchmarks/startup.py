@@ -0,0 +1,58 @@
+"""Cold start benchmark of `elcairo shows today` based on python -X importtime."""
+
+import statistics
+import subprocess
+import sys
+import time
+
+RUNS = 5
+TOP = 10
+COMMAND = ["shows", "today"]
+# Runs the cli like the console script does, without exiting the interpreter
+CODE = (
+    "from elcairo.main import elcairo; "
+    f"elcairo.main(args={COMMAND!r}, obj={{}}, standalone_mode=False)"
+)
+
+
+def run_once() -> tuple[float, dict[str, int]]:
+    """Wall seconds of a run and cumulative import microseconds per module."""
+    start: float = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CODE],
+        capture_output=True,
+        text=True,
+    )
+    wall: float = time.perf_counter() - start
+
+    imports: dict[str, int] = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        # "import time: self | cumulative | <two spaces per nesting level>name"
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        imports[name[1:].rstrip()] = int(cumulative)
+    return wall, imports
+
+
+def main() -> None:
+    walls: list[float] = []
+    imports: dict[str, int] = {}
+    for _ in range(RUNS):
+        wall, imports = run_once()
+        walls.append(wall)
+
+    top_level: int = sum(
+        cumulative for name, cumulative in imports.items() if not name.startswith(" ")
+    )
+    print(f"elcairo {' '.join(COMMAND)}")
+    print(f"  wall time: {statistics.median(walls) * 1000:.1f} ms (median of {RUNS})")
+    print(f"  imports:   {top_level / 1000:.1f} ms (last run)")
+    print("  heaviest imports:")
+    heaviest = sorted(imports.items(), key=lambda item: item[1], reverse=True)
+    for name, cumulative in heaviest[:TOP]:
+        print(f"    {cumulative / 1000:8.1f} ms  {name.strip()}")
+
+
+if __name__ == "__main__":
+    main()
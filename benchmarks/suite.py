@@ -0,0 +1,313 @@
+"""
+End-to-end benchmark suite, the results are written as JSON so runs can be
+compared.
+The site is replaced by a local server that replays the recorded calendars
+and event pages of tests/fixtures, the recorded months moved to the current
+and following months so populate finds them upcoming. Every poster is a
+generated gradient. Synthetic rows are only used to scale the shows
+benchmark past the recorded events. Every run works on temporary data
+directories.
+
+Usage: python -m benchmarks.suite [results.json]
+"""
+
+import contextlib
+import io
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import timeit
+from collections.abc import Iterator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import arrow
+
+from benchmarks.render import poster
+from elcairo.api.elcairo import iter_months
+from elcairo.commands.lib.events_printer import builtin_ascii_render
+from elcairo.commands.lib.shows_functions import next_sunday
+from elcairo.settings import DEFAULT_BASE_URL
+from tests.utils.html import fixture_pages
+from tests.utils.ics import fixture_paths
+
+RESULTS_FILE = "benchmark-results.json"
+SHOWS_ROWS = (100, 1_000, 10_000)
+SHOWS_COMMANDS = ("upcoming", "week")
+# Shows runs without the render and block caches, and with them warmed up
+SHOWS_CACHES = {"uncached": ("--no-render-cache",), "cached": ("--render-cache",)}
+RUNS = 5
+RENDER_REPEAT = 20
+EMPTY_CALENDAR = "BEGIN:VCALENDAR\r\nVERSION:2.0\r\nEND:VCALENDAR\r\n"
+# Date of the start and end of an event, the time is kept
+EVENT_DATE_RE = re.compile(r"^(DT(?:START|END)[^:\r\n]*:)(\d{8})", re.MULTILINE)
+
+
+def shift_calendar(text: str, months: int) -> str:
+    """Calendar with the dates of its events moved months ahead."""
+
+    def shift(match: re.Match) -> str:
+        date: arrow.Arrow = arrow.get(match.group(2), "YYYYMMDD").shift(months=months)
+        return f"{match.group(1)}{date.format('YYYYMMDD')}"
+
+    return EVENT_DATE_RE.sub(shift, text)
+
+
+class Site:
+    """Responses of the stand-in site."""
+
+    def __init__(self, poster_bytes: bytes) -> None:
+        now: arrow.Arrow = arrow.now()
+        months: Iterator[tuple[int, int]] = iter_months(now.year, now.month, 1)
+        self.calendars: dict[tuple[int, int], str] = {}
+        for path in fixture_paths():
+            year, month = next(months)
+            recorded_year, recorded_month = (int(part) for part in path.stem.split("-"))
+            self.calendars[year, month] = shift_calendar(
+                path.read_text(),
+                (year - recorded_year) * 12 + month - recorded_month,
+            )
+        self.pages: dict[str, str] = {
+            path.stem: path.read_text() for path in fixture_pages()
+        }
+        self.poster_bytes = poster_bytes
+
+    def response(self, path: str, base_url: str) -> tuple[str, bytes]:
+        """Content type and body of a path, the site urls point to base_url."""
+        parts: list[str] = path.split("/")
+        if path.startswith("/cartelera-de-sala/"):
+            year, month = (int(part) for part in parts[2].split("-"))
+            calendar: str = self.calendars.get((year, month), EMPTY_CALENDAR)
+            return "text/calendar", calendar.replace(
+                DEFAULT_BASE_URL, base_url
+            ).encode()
+        if path.startswith("/pelicula/"):
+            page: str = self.pages[parts[2]]
+            return "text/html", page.replace(DEFAULT_BASE_URL, base_url).encode()
+        if path.startswith("/wp-content/uploads/"):
+            return "image/jpeg", self.poster_bytes
+        raise KeyError(path)
+
+
+@contextlib.contextmanager
+def serve(site: Site) -> Iterator[str]:
+    """Serve site on a local port, yields its base url."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            try:
+                content_type, body = site.response(self.path, base_url)
+            except KeyError:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *_args) -> None:
+            pass
+
+    server: ThreadingHTTPServer = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    base_url: str = f"http://127.0.0.1:{server.server_address[1]}"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield base_url
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@contextlib.contextmanager
+def environment(**variables: str) -> Iterator[None]:
+    """Set environment variables for the duration of the block."""
+    previous: dict[str, str | None] = {name: os.getenv(name) for name in variables}
+    os.environ.update(variables)
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+def run_cli(*args: str) -> float:
+    """Run the cli in this process, returns its wall seconds."""
+    from elcairo.main import elcairo
+
+    output: io.StringIO = io.StringIO()
+    start: float = time.perf_counter()
+    with contextlib.redirect_stdout(output):
+        elcairo.main(args=list(args), obj={}, standalone_mode=False)
+    return time.perf_counter() - start
+
+
+def bench_populate(site: Site) -> dict:
+    """Seconds of a cold populate and of an incremental one after it."""
+    from elcairo.models import EventModel, db
+
+    with (
+        serve(site) as base_url,
+        tempfile.TemporaryDirectory() as data_dir,
+        environment(ELCAIRO_BASE_URL=base_url, ELCAIRO_DATA_DIR=data_dir),
+    ):
+        cold: float = run_cli("database", "-s", "populate")
+        incremental: float = run_cli("database", "-s", "populate", "--incremental")
+
+        db.init(Path(data_dir) / "elcairo.db")
+        with db.connection_context():
+            events: int = EventModel.select().count()
+
+    return {
+        "events": events,
+        "cold_seconds": cold,
+        "incremental_seconds": incremental,
+    }
+
+
+def event_rows(rows: int) -> list[dict]:
+    """
+    Rows of events spread from the start of today to the end of next sunday,
+    so both upcoming and week print every row whatever the weekday.
+    """
+    start: arrow.Arrow = arrow.now().floor("day")
+    end: arrow.Arrow = next_sunday().ceil("day")
+    step: float = (end - start).total_seconds() / 60 / rows
+    events: list[dict] = []
+    for index in range(rows):
+        date: arrow.Arrow = start.shift(minutes=int(index * step))
+        events.append(
+            {
+                "uid": f"{index}@benchmark",
+                "name": f"PELÍCULA {index}",
+                "date": str(date),
+                "compare_date": int(date.format("YYYYMMDDHHmm")),
+                "synopsis": "Una película sobre el cine, la memoria y la ciudad. " * 4,
+                "direction": "Directora",
+                "cast": "Actriz, Actor",
+                "genre": "Drama",
+                "duration": "95 minutos",
+                "origin": "Argentina",
+                "year": "2024",
+                "age": "ATP",
+                "cost": "$ 3000",
+                "image_path": "",
+                "image_url": "",
+                "url": f"https://elcairocinepublico.gob.ar/evento/{index}/",
+                "content_hash": "",
+            }
+        )
+    return events
+
+
+def bench_shows() -> dict:
+    """
+    Median milliseconds of each shows command for every number of rows,
+    without the caches and with them warmed up by a first run.
+    """
+    from elcairo.commands.lib.database_functions import upsert_events
+    from elcairo.migrations import migrate_database
+    from elcairo.models import db
+
+    results: dict[str, dict[str, dict[str, float]]] = {
+        cache: {command: {} for command in SHOWS_COMMANDS} for cache in SHOWS_CACHES
+    }
+    for rows in SHOWS_ROWS:
+        with (
+            tempfile.TemporaryDirectory() as data_dir,
+            environment(ELCAIRO_DATA_DIR=data_dir),
+        ):
+            db.init(Path(data_dir) / "elcairo.db")
+            with db.connection_context():
+                migrate_database()
+                with db.atomic():
+                    upsert_events(event_rows(rows))
+
+            for cache, options in SHOWS_CACHES.items():
+                for command in SHOWS_COMMANDS:
+                    run_cli("shows", *options, command)
+                    timings: list[float] = [
+                        run_cli("shows", *options, command) for _ in range(RUNS)
+                    ]
+                    results[cache][command][str(rows)] = (
+                        statistics.median(timings) * 1000
+                    )
+    return results
+
+
+def bench_render() -> dict:
+    """Posters per second of the builtin renderers."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        image_path: str = poster(Path(tmp_dir))
+        return {
+            renderer: RENDER_REPEAT
+            / timeit.timeit(
+                lambda color=color: builtin_ascii_render(image_path, color=color),
+                number=RENDER_REPEAT,
+            )
+            for renderer, color in (("builtin", False), ("builtin-color", True))
+        }
+
+
+def commit() -> str:
+    """Commit of the benchmarked tree, empty outside a git checkout."""
+    completed = subprocess.run(
+        ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True
+    )
+    return completed.stdout.strip()
+
+
+def main() -> None:
+    results_file: Path = Path(sys.argv[1] if len(sys.argv) > 1 else RESULTS_FILE)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        poster_bytes: bytes = Path(poster(Path(tmp_dir))).read_bytes()
+    site: Site = Site(poster_bytes)
+
+    populate: dict = bench_populate(site)
+    print(
+        f"populate: {populate['events']} events, "
+        f"cold {populate['cold_seconds']:.2f} s, "
+        f"incremental {populate['incremental_seconds']:.2f} s"
+    )
+    shows: dict = bench_shows()
+    for cache, commands in shows.items():
+        for command, timings in commands.items():
+            latencies: str = ", ".join(
+                f"{ms:.1f} ms @ {rows}" for rows, ms in timings.items()
+            )
+            print(f"shows {command} ({cache}): {latencies}")
+    render: dict = bench_render()
+    for renderer, per_second in render.items():
+        print(f"render {renderer}: {per_second:.1f} posters/s")
+
+    results_file.write_text(
+        json.dumps(
+            {
+                "commit": commit(),
+                "date": str(arrow.now()),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "populate": populate,
+                "shows_ms": shows,
+                "render_posters_per_second": render,
+            },
+            indent=2,
+        )
+    )
+    print(f"Results written to {results_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""On disk HTTP response cache."""
+
+import contextlib
+import hashlib
+import json
+import os
+import shutil
+import threading
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+@dataclass
+class CacheEntry:
+    """A cached response body with the validators needed to revalidate it."""
+
+    url: str
+    body: bytes
+    encoding: str = "utf-8"
+    etag: str = ""
+    last_modified: str = ""
+
+    @property
+    def text(self) -> str:
+        return self.body.decode(self.encoding, errors="replace")
+
+    def conditional_headers(self) -> dict[str, str]:
+        """Headers that turn a request for this entry into a conditional one."""
+        headers: dict[str, str] = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+@dataclass
+class CacheStats:
+    """Size information of the cache."""
+
+    entries: int
+    size: int
+    max_size: int
+
+
+class HttpCache:
+    """
+    Response bodies stored in a directory, one body file and one metadata file
+    per url. The least recently used entries are evicted once the bodies add up
+    to more than max_bytes.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._size: int | None = None
+
+    def load(self, url: str) -> CacheEntry | None:
+        """Get the entry of an url and mark it as recently used."""
+        body_path, meta_path = self._paths(url)
+        with self._lock:
+            try:
+                meta: dict = json.loads(meta_path.read_text())
+                body: bytes = body_path.read_bytes()
+                os.utime(body_path)
+            except (OSError, ValueError):
+                return None
+
+        if meta.get("url") != url:
+            return None
+
+        return CacheEntry(
+            url=url,
+            body=body,
+            encoding=meta.get("encoding") or "utf-8",
+            etag=meta.get("etag", ""),
+            last_modified=meta.get("last_modified", ""),
+        )
+
+    def store(self, entry: CacheEntry) -> None:
+        """
+        Save an entry, evicting old entries if the cache grows too big.
+        Storing is best effort, if the disk fails the entry is dropped and
+        the url is downloaded again next time.
+        """
+        body_path, meta_path = self._paths(entry.url)
+        meta: dict = asdict(entry)
+        del meta["body"]
+
+        with self._lock:
+            try:
+                self.directory.mkdir(parents=True, exist_ok=True)
+                size: int = self._current_size()
+                if body_path.exists():
+                    size -= body_path.stat().st_size
+
+                self._write(body_path, entry.body)
+                self._write(meta_path, json.dumps(meta).encode())
+
+                self._size = size + len(entry.body)
+                if self._size > self.max_bytes:
+                    self._evict()
+            except OSError:
+                # A body must not be left with the validators of another one
+                with contextlib.suppress(OSError):
+                    body_path.unlink(missing_ok=True)
+                    meta_path.unlink(missing_ok=True)
+                self._size = None
+
+    def stats(self) -> CacheStats:
+        """Number of entries and total size of the bodies."""
+        with self._lock:
+            bodies: list[Path] = self._bodies()
+            return CacheStats(
+                entries=len(bodies),
+                size=sum(body.stat().st_size for body in bodies),
+                max_size=self.max_bytes,
+            )
+
+    def clear(self) -> None:
+        """Remove every entry."""
+        with self._lock:
+            shutil.rmtree(self.directory, ignore_errors=True)
+            self._size = 0
+
+    def _paths(self, url: str) -> tuple[Path, Path]:
+        key: str = hashlib.sha256(url.encode()).hexdigest()
+        return self.directory / f"{key}.body", self.directory / f"{key}.json"
+
+    def _bodies(self) -> list[Path]:
+        if not self.directory.exists():
+            return []
+        return list(self.directory.glob("*.body"))
+
+    def _current_size(self) -> int:
+        if self._size is None:
+            self._size = sum(body.stat().st_size for body in self._bodies())
+        return self._size
+
+    def _evict(self) -> None:
+        """Remove least recently used entries until the size limit is met."""
+        bodies: list[tuple[float, int, Path]] = []
+        for body in self._bodies():
+            try:
+                stat: os.stat_result = body.stat()
+            except FileNotFoundError:
+                # Evicted by another process
+                continue
+            bodies.append((stat.st_mtime, stat.st_size, body))
+        bodies.sort()
+
+        size: int = sum(body_size for _, body_size, _ in bodies)
+        for _, body_size, body in bodies:
+            if size <= self.max_bytes:
+                break
+            body.unlink(missing_ok=True)
+            body.with_suffix(".json").unlink(missing_ok=True)
+            size -= body_size
+        self._size = size
+
+    @staticmethod
+    def _write(path: Path, data: bytes) -> None:
+        """Write a file atomically so readers never see a partial entry."""
+        tmp_path: Path = path.with_suffix(f"{path.suffix}.tmp{threading.get_ident()}")
+        try:
+            tmp_path.write_bytes(data)
+            tmp_path.replace(path)
+        except OSError:
+            tmp_path.unlink(missing_ok=True)
+            raise
@@ -1,9 +1,14 @@
 """Cine El Cairo API"""
 
 import datetime
+import hashlib
 import re
-import time
-from dataclasses import dataclass, field
+import threading
+import urllib.parse
+from collections import deque
+from collections.abc import Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import cached_property
 from re import Match
 
 import arrow
@@ -11,36 +16,32 @@ import bs4
 import icalendar
 import requests
 
-_IMAGE_FMTTYPE_RE = re.compile(r"^image/(?:jpeg|png|webp)$")
-
-
-@dataclass
-class ElCairoExtraInfo:
-    direction: str = ""
-    cast: str = ""
-    genre: str = ""
-    duration: str = ""
-    origin: str = ""
-    year: str = ""
-    age: str = ""
+import elcairo.settings as settings
+from elcairo.api.cache import CacheEntry, HttpCache
+from elcairo.api.events import ElCairoEvent, ElCairoExtraInfo
+from elcairo.api.http import RateLimiter, create_session, normalize_url
+from elcairo.api.ics import IcsEvent, parse_events
+from elcairo.api.page import PageSections, extract_sections
+from elcairo.api.stats import PipelineStats
 
-
-@dataclass
-class ElCairoEvent:
-    name: str = ""
-    date: str = ""
-    synopsis: str = ""
-    cost: str = ""
-    image_url: str = ""
-    url: str = ""
-    image_path: str = ""
-    extra_info: ElCairoExtraInfo = field(default_factory=ElCairoExtraInfo)
+_IMAGE_FMTTYPE_RE = re.compile(r"^image/(?:jpeg|png|webp)$")
+_HASHED_PROPERTIES = (
+    "SUMMARY",
+    "DTSTART",
+    "URL",
+    "ATTACH",
+    "LAST-MODIFIED",
+    "SEQUENCE",
+)
 
 
 class CalEvent:
-    """Wrapper around an icalendar VEVENT component."""
+    """
+    Wrapper around a VEVENT, an IcsEvent or an icalendar component.
+    Each property is decoded on first access and memoized.
+    """
 
-    def __init__(self, component: icalendar.cal.Component) -> None:
+    def __init__(self, component: IcsEvent | icalendar.cal.Component) -> None:
         self._component = component
         self.uid: str = str(component.get("UID", ""))
 
@@ -50,12 +51,12 @@ class CalEvent:
     def __eq__(self, other: object) -> bool:
         return isinstance(other, CalEvent) and self.uid == other.uid
 
-    @property
+    @cached_property
     def name(self) -> str | None:
         val = self._component.get("SUMMARY")
         return str(val) if val is not None else None
 
-    @property
+    @cached_property
     def begin(self) -> arrow.Arrow | None:
         try:
             dtstart = self._component.decoded("DTSTART")
@@ -69,12 +70,12 @@ class CalEvent:
             )
         return arrow.get(dtstart)
 
-    @property
+    @cached_property
     def url(self) -> str | None:
         val = self._component.get("URL")
         return str(val) if val is not None else None
 
-    @property
+    @cached_property
     def extra(self) -> list:
         attach = self._component.get("ATTACH")
         if attach is None:
@@ -83,77 +84,187 @@ class CalEvent:
             return attach
         return [attach]
 
+    @cached_property
+    def content_hash(self) -> str:
+        """
+        Hash of the properties the event is built from and of its revision
+        markers, it changes whenever the calendar entry changes.
+        """
+        digest = hashlib.sha256()
+        for prop in _HASHED_PROPERTIES:
+            values = self._component.get(prop)
+            if values is None:
+                continue
+            if not isinstance(values, list):
+                values = [values]
+            for value in values:
+                params: dict = dict(getattr(value, "params", {}))
+                ical: bytes | str = (
+                    value.to_ical() if hasattr(value, "to_ical") else str(value)
+                )
+                line: str = f"{prop};{sorted(params.items())}:{ical!r}\n"
+                digest.update(line.encode())
+        return digest.hexdigest()
+
+
+def iter_months(year: int, month: int, step: int) -> Iterator[tuple[int, int]]:
+    """Yield (year, month) pairs starting at year-month, step months apart."""
+    index: int = year * 12 + month - 1
+    while True:
+        yield index // 12, index % 12 + 1
+        index += step
+
 
 class ElCairo:
     """Get El Cairo's information."""
 
+    def __init__(
+        self,
+        month_workers: int = 3,
+        prefetch_months: int = 2,
+        request_interval: float = 0.5,
+        page_workers: int = 8,
+        host_connections: int = 4,
+        cache: HttpCache | None = None,
+        session: requests.Session | None = None,
+        page_interval: float = 0.0,
+        base_url: str | None = None,
+        limiter: RateLimiter | None = None,
+    ) -> None:
+        """
+        month_workers is the number of monthly calendars downloaded at once,
+        prefetch_months how many months past the current one are requested
+        ahead of time and request_interval the minimum number of seconds
+        between the start of two calendar requests.
+        page_workers is the number of event pages scraped at once and
+        host_connections the maximum number of simultaneous requests to the
+        same host.
+        cache, if given, is used to revalidate responses instead of downloading
+        them again.
+        session is the connection pool used for every request, by default one
+        is created with a connection per page worker.
+        page_interval is the minimum number of seconds between the start of
+        two event page requests.
+        base_url is the root url of the site, by default the one of
+        elcairo.settings.base_url.
+        limiter, if given, spaces out every calendar and event page request
+        together, in place of request_interval and page_interval. It can be
+        shared with other requests to the site.
+        """
+        self.month_workers = month_workers
+        self.prefetch_months = prefetch_months
+        self.limiter: RateLimiter = limiter or RateLimiter(request_interval)
+        self.page_limiter: RateLimiter = limiter or RateLimiter(page_interval)
+        self.page_workers = page_workers
+        self.host_connections = host_connections
+        self.cache = cache
+        self.base_url: str = (base_url or settings.base_url()).rstrip("/")
+        self.stats: PipelineStats = PipelineStats()
+        self.session: requests.Session = session or create_session(
+            pool_size=max(page_workers, month_workers)
+        )
+        self.session.hooks["response"].append(self.time_response)
+        # (year, month) of every month the crawls failed to download
+        self.failed_months: list[tuple[int, int]] = []
+        self._host_slots: dict[str, threading.BoundedSemaphore] = {}
+        self._host_slots_lock = threading.Lock()
+
     def ics_events_to_elcairo_events(
         self, events: set[CalEvent]
     ) -> dict[str, ElCairoEvent]:
         """
         Returns a json of events.
         This method scraps for more info in the specified event url.
+        The event pages are scraped concurrently, an event whose page can't be
+        scraped keeps the information of the calendar only.
+        Every screening of a movie shares the same url, so each distinct page
+        is scraped once and its result is shared by all of its events.
         """
         events_dict: dict[str, ElCairoEvent] = {}
 
-        for event in events:
-            elcairo_event_args: dict = {}
+        with ThreadPoolExecutor(max_workers=self.page_workers) as executor:
+            scraped: dict[str, Future[dict]] = {}
+            for event in events:
+                if event.url and normalize_url(event.url) not in scraped:
+                    scraped[normalize_url(event.url)] = executor.submit(
+                        self.scrape_event_page, event.url
+                    )
+
+            for event in events:
+                elcairo_event_args: dict = {}
 
-            if event.name:
-                elcairo_event_args["name"] = event.name.upper()
+                if event.name:
+                    elcairo_event_args["name"] = event.name.upper()
 
-            if event.begin:
-                elcairo_event_args["date"] = str(event.begin)
+                if event.begin:
+                    elcairo_event_args["date"] = str(event.begin)
 
-            if event.extra:
-                elcairo_event_args["image_url"] = self.get_image(event.extra)
+                if event.extra:
+                    elcairo_event_args["image_url"] = self.get_image(event.extra)
 
-            if event.url:
-                elcairo_event_args["url"] = event.url
+                if event.url:
+                    elcairo_event_args["url"] = event.url
+                    elcairo_event_args.update(
+                        scraped[normalize_url(event.url)].result()
+                    )
 
-                soup: bs4.BeautifulSoup | None = self.get_soup(event.url)
-                if soup is not None:
-                    elcairo_event_args["synopsis"] = self.get_synopsis(soup)
-                    elcairo_event_args["cost"] = self.get_cost(soup)
-                    elcairo_event_args["extra_info"] = self.get_extra_info(soup)
+                elcairo_event_args["content_hash"] = event.content_hash
+                elcairo_event_args["uid"] = event.uid
 
-            events_dict[event.uid] = ElCairoEvent(**elcairo_event_args)
+                events_dict[event.uid] = ElCairoEvent(**elcairo_event_args)
 
         return events_dict
 
+    def scrape_event_page(self, url: str) -> dict:
+        """
+        Scrap the synopsis, cost and extra info of an event url.
+        Only the sections with that information are parsed, a page the
+        targeted parser can't read is parsed again with BeautifulSoup.
+        Returns an empty dict if the page can't be downloaded or parsed.
+        """
+        html: str | None = self.get_html(url)
+        if html is None:
+            return {}
+
+        try:
+            with self.stats.measure("page_parse"):
+                sections: PageSections = extract_sections(html)
+        except Exception:
+            return self.scrape_soup(html)
+
+        try:
+            with self.stats.measure("page_extract"):
+                return {
+                    "synopsis": sections.synopsis,
+                    "cost": sections.cost,
+                    "extra_info": self.extra_info_from_text(sections.extra_info),
+                }
+        except Exception:
+            return {}
+
+    def scrape_soup(self, html: str) -> dict:
+        """Scrap an event page from its complete BeautifulSoup tree."""
+        try:
+            with self.stats.measure("page_parse"):
+                soup: bs4.BeautifulSoup = bs4.BeautifulSoup(html, "html.parser")
+            with self.stats.measure("page_extract"):
+                return {
+                    "synopsis": self.get_synopsis(soup),
+                    "cost": self.get_cost(soup),
+                    "extra_info": self.get_extra_info(soup),
+                }
+        except Exception:
+            return {}
+
     def get_upcoming_events(self) -> set[CalEvent]:
         """Get upcoming events."""
         now: arrow.Arrow = arrow.now()
 
-        year: int = now.year
-        month: int = now.month
-
         upcoming_events: set[CalEvent] = set()
-        current_events, error = self.fetch_events(
-            str(year).zfill(4), str(month).zfill(2)
-        )
-        while current_events != set() or error:
-            if month == 12:
-                month = 0
-                year += 1
-            month += 1
-
-            if error:
-                current_events, error = self.fetch_events(
-                    str(year).zfill(4), str(month).zfill(2)
-                )
-                continue
-
-            current_upcoming_events: set[CalEvent] = set()
+        for current_events in self.crawl_months(now, step=1):
             for event in current_events:
                 if event.begin is not None and event.begin >= now:
-                    current_upcoming_events.add(event)
-
-            upcoming_events.update(current_upcoming_events)
-
-            current_events, error = self.fetch_events(
-                str(year).zfill(4), str(month).zfill(2)
-            )
+                    upcoming_events.add(event)
 
         return upcoming_events
 
@@ -161,37 +272,62 @@ class ElCairo:
         """Get past events."""
         now: arrow.Arrow = arrow.now()
 
-        year: int = now.year
-        month: int = now.month
-
         past_events: set[CalEvent] = set()
-        current_events, error = self.fetch_events(
-            str(year).zfill(4), str(month).zfill(2)
-        )
-        while current_events != set() or error:
-            if month == 1:
-                month = 13
-                year -= 1
-            month -= 1
-
-            if error:
-                current_events, error = self.fetch_events(
-                    str(year).zfill(4), str(month).zfill(2)
-                )
-                continue
-
-            current_past_events: set[CalEvent] = set()
+        for current_events in self.crawl_months(now, step=-1):
             for event in current_events:
                 if event.begin is not None and event.begin <= now:
-                    current_past_events.add(event)
+                    past_events.add(event)
 
-            past_events.update(current_past_events)
+        return past_events
 
-            current_events, error = self.fetch_events(
-                str(year).zfill(4), str(month).zfill(2)
-            )
+    def crawl_months(self, start: arrow.Arrow, step: int) -> list[set[CalEvent]]:
+        """
+        Fetch the events of consecutive months, beginning with the month of
+        start and moving step months at a time, until the first empty month.
+        Months that fail to download are skipped and listed in failed_months.
+        Up to prefetch_months months ahead are requested speculatively so the
+        network round trips overlap.
+        """
+        months: Iterator[tuple[int, int]] = iter_months(start.year, start.month, step)
+        crawled: list[set[CalEvent]] = []
 
-        return past_events
+        executor: ThreadPoolExecutor = ThreadPoolExecutor(
+            max_workers=self.month_workers
+        )
+        try:
+            pending: deque[tuple[tuple[int, int], Future[tuple[set[CalEvent], bool]]]]
+            pending = deque(
+                self.submit_month(executor, next(months))
+                for _ in range(self.prefetch_months + 1)
+            )
+            while True:
+                month, future = pending.popleft()
+                current_events, error = future.result()
+                if current_events == set() and not error:
+                    break
+
+                pending.append(self.submit_month(executor, next(months)))
+
+                if error:
+                    self.failed_months.append(month)
+                else:
+                    crawled.append(current_events)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        return crawled
+
+    def submit_month(
+        self, executor: ThreadPoolExecutor, month: tuple[int, int]
+    ) -> tuple[tuple[int, int], Future[tuple[set[CalEvent], bool]]]:
+        """Schedule the fetch of a (year, month), paired with it."""
+        return month, executor.submit(self.fetch_month, *month)
+
+    def fetch_month(self, year: int, month: int) -> tuple[set[CalEvent], bool]:
+        """Fetch the events of a month, respecting the politeness limiter."""
+        self.limiter.wait()
+        with self.stats.measure("month_fetch"):
+            return self.fetch_events(str(year).zfill(4), str(month).zfill(2))
 
     def get_all_events(self) -> set[CalEvent]:
         """Get all events."""
@@ -215,11 +351,22 @@ class ElCairo:
         all_events: set[CalEvent] = self.get_all_events()
         return self.ics_events_to_elcairo_events(all_events)
 
-    def get_soup(self, url: str) -> bs4.BeautifulSoup | None:
-        """Get the beautiful soup of El Cairo's url."""
+    def host_slot(self, url: str) -> threading.BoundedSemaphore:
+        """Semaphore that caps the simultaneous requests to the host of url."""
+        host: str = urllib.parse.urlsplit(url).netloc
+        with self._host_slots_lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.BoundedSemaphore(
+                    self.host_connections
+                )
+            return self._host_slots[host]
+
+    def get_html(self, url: str) -> str | None:
+        """Get the html of El Cairo's url, None if it can't be downloaded."""
+        self.page_limiter.wait()
         try:
-            response: requests.Response = requests.get(url, timeout=10)
-            response.raise_for_status()
+            with self.host_slot(url), self.stats.measure("page_fetch"):
+                return self.get_text(url, "page_fetch")
         except (
             requests.exceptions.HTTPError,
             requests.exceptions.Timeout,
@@ -228,9 +375,14 @@ class ElCairo:
         ):
             return None
 
-        response_html: str = response.text
+    def get_soup(self, url: str) -> bs4.BeautifulSoup | None:
+        """Get the beautiful soup of El Cairo's url."""
+        response_html: str | None = self.get_html(url)
+        if response_html is None:
+            return None
 
-        return bs4.BeautifulSoup(response_html, "html.parser")
+        with self.stats.measure("page_parse"):
+            return bs4.BeautifulSoup(response_html, "html.parser")
 
     @staticmethod
     def get_cost(soup: bs4.BeautifulSoup) -> str:
@@ -253,39 +405,45 @@ class ElCairo:
     @staticmethod
     def get_extra_info(soup: bs4.BeautifulSoup) -> ElCairoExtraInfo:
         """Get the extra info inside a El Cairo's url."""
-        extra_info_args: dict[str, str] = {}
         data_elem: bs4.Tag | None = soup.select_one(".ficha-tecnica-online")
-        if data_elem is not None:
-            data_lines: list[str] = data_elem.text.split("\n")
-            if len(data_lines) == 0:
-                return ElCairoExtraInfo()
-
-            field_names: dict = {
-                "DIRECCIÓN": "direction",
-                "DIRECCION": "direction",
-                "ELENCO": "cast",
-                "GÉNERO": "genre",
-                "GENERO": "genre",
-                "DURACIÓN": "duration",
-                "DURACION": "duration",
-                "ORIGEN": "origin",
-                "AÑO": "year",
-                "ANO": "year",
-                "CALIFICACIÓN": "age",
-                "CALIFICACION": "age",
-            }
-
-            for line in data_lines:
-                match = re.match(r"^ *(\w+): (.+)$", line)
-                if not match:
-                    continue
-
-                field_name: str = match.group(1)
-                field_data: str = match.group(2)
-
-                key: str | None = field_names.get(field_name)
-                if key is not None:
-                    extra_info_args[key] = field_data
+        if data_elem is None:
+            return ElCairoExtraInfo()
+        return ElCairo.extra_info_from_text(data_elem.text)
+
+    @staticmethod
+    def extra_info_from_text(text: str) -> ElCairoExtraInfo:
+        """Get the extra info from the text of its section."""
+        extra_info_args: dict[str, str] = {}
+        data_lines: list[str] = text.split("\n")
+        if len(data_lines) == 0:
+            return ElCairoExtraInfo()
+
+        field_names: dict = {
+            "DIRECCIÓN": "direction",
+            "DIRECCION": "direction",
+            "ELENCO": "cast",
+            "GÉNERO": "genre",
+            "GENERO": "genre",
+            "DURACIÓN": "duration",
+            "DURACION": "duration",
+            "ORIGEN": "origin",
+            "AÑO": "year",
+            "ANO": "year",
+            "CALIFICACIÓN": "age",
+            "CALIFICACION": "age",
+        }
+
+        for line in data_lines:
+            match = re.match(r"^ *(\w+): (.+)$", line)
+            if not match:
+                continue
+
+            field_name: str = match.group(1)
+            field_data: str = match.group(2)
+
+            key: str | None = field_names.get(field_name)
+            if key is not None:
+                extra_info_args[key] = field_data
 
         return ElCairoExtraInfo(**extra_info_args)
 
@@ -299,16 +457,53 @@ class ElCairo:
                     return str(item)
         return ""
 
-    @staticmethod
-    def fetch_events(year: str, month: str) -> tuple[set[CalEvent], bool]:
-        """Fetch the ics file of the year-month date."""
-        time.sleep(0.5)
+    def get_text(self, url: str, stage: str) -> str:
+        """
+        Get the body of an url.
+        When there is a cache the request is conditional and a 304 answer is
+        served from the cache, counting as a cache hit of stage, otherwise the
+        downloaded bytes are counted in stage.
+        Raises the requests exceptions of a failed request.
+        """
+        entry: CacheEntry | None = None
+        if self.cache is not None:
+            entry = self.cache.load(url)
+
+        headers: dict[str, str] = entry.conditional_headers() if entry else {}
+        response: requests.Response = self.session.get(url, headers=headers, timeout=10)
+
+        if entry is not None and response.status_code == 304:
+            self.stats.hit(stage)
+            return entry.text
+
+        response.raise_for_status()
+        self.stats.add_bytes(stage, len(response.content))
+
+        etag: str = response.headers.get("ETag", "")
+        last_modified: str = response.headers.get("Last-Modified", "")
+        if self.cache is not None and (etag or last_modified):
+            self.cache.store(
+                CacheEntry(
+                    url=url,
+                    body=response.content,
+                    encoding=response.encoding or response.apparent_encoding,
+                    etag=etag,
+                    last_modified=last_modified,
+                )
+            )
+
+        return response.text
 
-        ics_url: str = f"https://elcairocinepublico.gob.ar/cartelera-de-sala/{year}-{month}/?ical=1"
+    def time_response(self, response: requests.Response, *_args, **_kwargs) -> None:
+        """Session hook that records how long each request took to answer."""
+        self.stats.record("http_request", response.elapsed.total_seconds())
+
+    def fetch_events(self, year: str, month: str) -> tuple[set[CalEvent], bool]:
+        """Fetch the ics file of the year-month date."""
+        ics_url: str = f"{self.base_url}/cartelera-de-sala/{year}-{month}/?ical=1"
 
         try:
-            response = requests.get(ics_url, timeout=10)
-            response.raise_for_status()
+            response_text: str = self.get_text(ics_url, "month_fetch")
         except (
             requests.exceptions.HTTPError,
             requests.exceptions.Timeout,
@@ -320,8 +515,8 @@ class ElCairo:
         error: bool = False
         events: set[CalEvent] = set()
         try:
-            cal = icalendar.Calendar.from_ical(response.text)
-            events = {CalEvent(c) for c in cal.walk() if c.name == "VEVENT"}
+            with self.stats.measure("month_parse"):
+                events = {CalEvent(c) for c in parse_events(response_text)}
         except Exception:
             error = True
 
@@ -0,0 +1,28 @@
+"""El Cairo events data."""
+
+from dataclasses import dataclass, field
+
+
+@dataclass(slots=True)
+class ElCairoExtraInfo:
+    direction: str = ""
+    cast: str = ""
+    genre: str = ""
+    duration: str = ""
+    origin: str = ""
+    year: str = ""
+    age: str = ""
+
+
+@dataclass(slots=True)
+class ElCairoEvent:
+    name: str = ""
+    date: str = ""
+    synopsis: str = ""
+    cost: str = ""
+    image_url: str = ""
+    url: str = ""
+    image_path: str = ""
+    content_hash: str = ""
+    uid: str = ""
+    extra_info: ElCairoExtraInfo = field(default_factory=ElCairoExtraInfo)
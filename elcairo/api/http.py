@@ -0,0 +1,81 @@
+"""HTTP helpers shared by the scraper."""
+
+import threading
+import time
+import urllib.parse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+RETRY_STATUSES = (500, 502, 503, 504)
+
+
+class RateLimiter:
+    """Space out requests so that at most one starts every `interval` seconds."""
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._next_slot: float = 0.0
+
+    def wait(self) -> None:
+        """Block until the next request is allowed to start."""
+        with self._lock:
+            now: float = time.monotonic()
+            slot: float = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+
+        delay: float = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+def normalize_url(url: str) -> str:
+    """
+    Canonical form of an url, used to recognize the same page behind
+    different spellings: lowercase scheme and host, no fragment and no
+    trailing slash.
+    """
+    parts: urllib.parse.SplitResult = urllib.parse.urlsplit(url.strip())
+    return urllib.parse.urlunsplit(
+        (
+            parts.scheme.lower(),
+            parts.netloc.lower(),
+            parts.path.rstrip("/") or "/",
+            parts.query,
+            "",
+        )
+    )
+
+
+def create_session(
+    pool_size: int = 10,
+    retries: int = 3,
+    backoff: float = 0.5,
+) -> requests.Session:
+    """
+    Session with keep-alive connections shared by all the requests.
+    pool_size is the number of connections kept open per host, failed
+    connections, timeouts and 5xx answers are retried up to retries times
+    waiting backoff * 2 ** (retry - 1) seconds between attempts.
+    Per request timing can be collected adding a "response" hook.
+    """
+    retry: Retry = Retry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        status=retries,
+        backoff_factor=backoff,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset({"GET", "HEAD"}),
+        raise_on_status=False,
+    )
+    adapter: HTTPAdapter = HTTPAdapter(
+        pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry
+    )
+
+    session: requests.Session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
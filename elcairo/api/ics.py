@@ -0,0 +1,225 @@
+"""Fast extraction of the calendar events elcairo reads."""
+
+import datetime
+import re
+import zoneinfo
+
+import icalendar
+
+from elcairo.api.ics_text import escape_text, unescape_text
+
+# Properties of a VEVENT that elcairo reads, everything else is skipped
+EXTRACTED_PROPERTIES = frozenset(
+    ("UID", "SUMMARY", "DTSTART", "URL", "ATTACH", "LAST-MODIFIED", "SEQUENCE")
+)
+TEXT_PROPERTIES = frozenset(("UID", "SUMMARY"))
+
+_FOLD_RE = re.compile(r"\r?\n[ \t]")
+_DATE_RE = re.compile(r"^(\d{4})(\d{2})(\d{2})$")
+_DATETIME_RE = re.compile(r"^(\d{4})(\d{2})(\d{2})T(\d{2})(\d{2})(\d{2})(Z?)$")
+
+
+class IcsFormatError(ValueError):
+    """The calendar can't be read by the fast extractor."""
+
+
+class IcsProperty(str):
+    """
+    Value of a property together with its parameters, it quacks like the
+    icalendar property types for what CalEvent uses.
+    """
+
+    params: dict[str, str]
+    ical: bytes
+
+    def __new__(cls, value: str, params: dict[str, str], ical: str) -> "IcsProperty":
+        prop = super().__new__(cls, value)
+        prop.params = params
+        prop.ical = ical.encode()
+        return prop
+
+    def to_ical(self) -> bytes:
+        """Value as written in a calendar."""
+        return self.ical
+
+
+class IcsEvent:
+    """
+    The extracted properties of a VEVENT, with the get and decoded methods
+    of an icalendar component.
+    A property found more than once, like ATTACH, is a list.
+    """
+
+    __slots__ = ("properties",)
+
+    def __init__(self) -> None:
+        self.properties: dict[str, IcsProperty | list[IcsProperty]] = {}
+
+    def add(self, name: str, prop: IcsProperty) -> None:
+        """Add a property, keeping the previous values of the same name."""
+        current = self.properties.get(name)
+        if current is None:
+            self.properties[name] = prop
+        elif isinstance(current, list):
+            current.append(prop)
+        else:
+            self.properties[name] = [current, prop]
+
+    def get(self, name: str, default=None):
+        return self.properties.get(name, default)
+
+    def decoded(self, name: str) -> datetime.date | datetime.datetime:
+        """Date of a date property, raises KeyError if it is missing."""
+        prop = self.properties[name]
+        if isinstance(prop, list):
+            prop = prop[0]
+        return decode_date(prop)
+
+
+def decode_date(prop: IcsProperty) -> datetime.date | datetime.datetime:
+    """
+    Date or datetime of a DTSTART like property, floating times are naive.
+    Raises IcsFormatError for values or time zones it doesn't know.
+    """
+    value: str = str(prop)
+    if prop.params.get("VALUE") == "DATE" or len(value) == 8:
+        match = _DATE_RE.match(value)
+        if match is None:
+            raise IcsFormatError(f"Invalid date: {value}")
+        return datetime.date(*map(int, match.groups()))
+
+    match = _DATETIME_RE.match(value)
+    if match is None:
+        raise IcsFormatError(f"Invalid datetime: {value}")
+    *parts, utc = match.groups()
+
+    tzinfo: datetime.tzinfo | None = None
+    if utc:
+        tzinfo = datetime.timezone.utc
+    elif "TZID" in prop.params:
+        try:
+            tzinfo = zoneinfo.ZoneInfo(prop.params["TZID"])
+        except (zoneinfo.ZoneInfoNotFoundError, ValueError) as exc:
+            raise IcsFormatError(f"Unknown time zone: {prop.params['TZID']}") from exc
+
+    return datetime.datetime(*map(int, parts), tzinfo=tzinfo)
+
+
+def split_params(head: str) -> tuple[str, dict[str, str]]:
+    """Name and parameters of the part of a content line before the value."""
+    name, *raw_params = (
+        head.split(";") if '"' not in head else re.findall(r'(?:[^;"]|"[^"]*")+', head)
+    )
+    params: dict[str, str] = {}
+    for raw_param in raw_params:
+        key, sep, value = raw_param.partition("=")
+        if not sep:
+            raise IcsFormatError(f"Invalid parameter: {raw_param}")
+        params[key.upper()] = value.strip('"')
+    return name.upper(), params
+
+
+def value_start(line: str) -> int:
+    """Index of the colon that separates the value, skipping quoted params."""
+    colon: int = line.find(":")
+    quote: int = line.find('"')
+    if quote == -1 or quote > colon:
+        return colon
+
+    in_quotes: bool = False
+    for index, char in enumerate(line):
+        if char == '"':
+            in_quotes = not in_quotes
+        elif char == ":" and not in_quotes:
+            return index
+    return -1
+
+
+def extract_events(text: str) -> list[IcsEvent]:
+    """
+    Extract the VEVENTs of a calendar in a single pass over its lines,
+    reading only the EXTRACTED_PROPERTIES.
+    Raises IcsFormatError if the text isn't a calendar it can read.
+    """
+    lines: list[str] = _FOLD_RE.sub("", text.lstrip("\ufeff \r\n")).splitlines()
+    if not lines or lines[0].strip().upper() != "BEGIN:VCALENDAR":
+        raise IcsFormatError("Not a calendar")
+
+    events: list[IcsEvent] = []
+    event: IcsEvent | None = None
+    # Components nested inside the event, like VALARM
+    depth: int = 0
+
+    for line in lines:
+        colon: int = value_start(line)
+        if colon == -1:
+            if line.strip():
+                raise IcsFormatError(f"Invalid line: {line}")
+            continue
+
+        head: str = line[:colon]
+        name_end: int = head.find(";")
+        name: str = (head if name_end == -1 else head[:name_end]).upper()
+
+        if name == "BEGIN":
+            if event is not None:
+                depth += 1
+            elif line[colon + 1 :].strip().upper() == "VEVENT":
+                event = IcsEvent()
+            continue
+
+        if name == "END":
+            if event is None:
+                continue
+            if depth:
+                depth -= 1
+                continue
+            if line[colon + 1 :].strip().upper() != "VEVENT":
+                raise IcsFormatError(f"Unexpected line: {line}")
+            events.append(event)
+            event = None
+            continue
+
+        if event is None or depth or name not in EXTRACTED_PROPERTIES:
+            continue
+
+        _, params = split_params(head)
+        raw_value: str = line[colon + 1 :]
+        if "ENCODING" in params or params.get("VALUE") == "BINARY":
+            raise IcsFormatError(f"Binary value: {name}")
+
+        if name in TEXT_PROPERTIES:
+            value: str = unescape_text(raw_value)
+            event.add(name, IcsProperty(value, params, escape_text(value)))
+        elif name == "SEQUENCE":
+            try:
+                sequence: str = str(int(raw_value))
+            except ValueError as exc:
+                raise IcsFormatError(f"Invalid sequence: {raw_value}") from exc
+            event.add(name, IcsProperty(sequence, params, sequence))
+        else:
+            prop = IcsProperty(raw_value, params, raw_value)
+            if name == "DTSTART":
+                # Fail now, while the full parse can still take over
+                decode_date(prop)
+            event.add(name, prop)
+
+    if event is not None:
+        raise IcsFormatError("Unterminated VEVENT")
+
+    return events
+
+
+def parse_events(text: str) -> list:
+    """
+    VEVENTs of a calendar, extracted with the fast path or, for calendars it
+    can't read, with the full icalendar parse.
+    Raises the icalendar exceptions when neither can read the text.
+    """
+    try:
+        return extract_events(text)
+    except IcsFormatError:
+        calendar = icalendar.Calendar.from_ical(text)
+        return [
+            component for component in calendar.walk() if component.name == "VEVENT"
+        ]
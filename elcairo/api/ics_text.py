@@ -0,0 +1,59 @@
+"""
+TEXT values and content lines of iCalendar, without dependencies so the
+writers don't load icalendar.
+"""
+
+import re
+
+# Escapes icalendar decodes, it also accepts an escaped colon
+_ESCAPE_RE = re.compile(r"\\([\\;,:nN])")
+_UNESCAPED = {"n": "\n", "N": "\n"}
+
+
+def unescape_text(text: str) -> str:
+    """
+    Unescape a TEXT value in a single pass, so an escaped backslash followed
+    by n stays a backslash and an n.
+    """
+    if "\\" not in text:
+        return text
+    return _ESCAPE_RE.sub(_unescape, text)
+
+
+def _unescape(match: re.Match) -> str:
+    return _UNESCAPED.get(match.group(1), match.group(1))
+
+
+def escape_text(text: str) -> str:
+    """Escape a TEXT value the way icalendar writes it."""
+    return (
+        text.replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\r\n", "\\n")
+        .replace("\n", "\\n")
+        .replace("\r", "\\n")
+    )
+
+
+def fold_line(line: str) -> str:
+    """
+    Content line folded in lines of at most 75 octets, without splitting a
+    character, the continuation lines start with a space.
+    """
+    if len(line.encode()) <= 75:
+        return line
+
+    parts: list[str] = []
+    part: list[str] = []
+    size: int = 0
+    for char in line:
+        char_size: int = len(char.encode())
+        if size + char_size > 75:
+            parts.append("".join(part))
+            # The leading space of the continuation counts
+            part, size = [" "], 1
+        part.append(char)
+        size += char_size
+    parts.append("".join(part))
+    return "\r\n".join(parts)
@@ -0,0 +1,240 @@
+"""Targeted extraction of the sections of an event page elcairo reads."""
+
+from dataclasses import dataclass
+from html.parser import HTMLParser
+
+SYNOPSIS_CLASS = "sinopsis-online"
+COST_CLASS = "informacion-entradas"
+EXTRA_INFO_CLASS = "ficha-tecnica-online"
+
+# Elements without end tag
+VOID_ELEMENTS = frozenset(
+    (
+        "area",
+        "base",
+        "br",
+        "col",
+        "embed",
+        "hr",
+        "img",
+        "input",
+        "link",
+        "meta",
+        "param",
+        "source",
+        "track",
+        "wbr",
+    )
+)
+# Elements whose strings aren't part of the text of their parents
+HIDDEN_ELEMENTS = frozenset(("script", "style", "template"))
+# Elements whose whitespace is kept as is
+PRESERVE_WHITESPACE_ELEMENTS = frozenset(("pre", "textarea"))
+ASCII_SPACES = " \n\t\x0c\r"
+
+
+@dataclass(slots=True)
+class PageSections:
+    """
+    Text of the sections of an event page.
+    synopsis and cost are the text of the first paragraph of their section,
+    extra_info the whole text of its section.
+    """
+
+    synopsis: str = ""
+    cost: str = ""
+    extra_info: str = ""
+
+
+class _Capture:
+    """Text of an element, while it is open."""
+
+    __slots__ = ("depth", "parts")
+
+    def __init__(self, depth: int) -> None:
+        self.depth = depth
+        self.parts: list[str] = []
+
+
+class _StopParsing(Exception):
+    """Every section was found."""
+
+
+class SectionParser(HTMLParser):
+    """
+    Streaming parser that keeps only the text of the page sections.
+    Open elements are tracked the way BeautifulSoup's html.parser builder
+    nests them, so the text is the same it would extract, and the parsing
+    stops as soon as the three sections are closed.
+    """
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.sections: PageSections = PageSections()
+        self._stack: list[str] = []
+        self._hidden: int = 0
+        self._preserve: int = 0
+        # Text read since the last tag
+        self._data: list[str] = []
+        # Void elements whose end tag, if any, is ignored
+        self._closed_void: list[str] = []
+        self._pending: set[str] = {SYNOPSIS_CLASS, COST_CLASS, EXTRA_INFO_CLASS}
+        # Open section of each class, only the first one of each counts
+        self._sections: dict[str, _Capture] = {}
+        self._seen: set[str] = set()
+        # Open first paragraph of the synopsis and cost sections
+        self._paragraphs: dict[str, _Capture] = {}
+
+    def handle_starttag(
+        self,
+        tag: str,
+        attrs: list[tuple[str, str | None]],
+        handle_void: bool = True,
+    ) -> None:
+        self._flush()
+        void: bool = tag in VOID_ELEMENTS
+        if not void:
+            self._stack.append(tag)
+            self._count(tag, 1)
+        elif handle_void:
+            self._closed_void.append(tag)
+        depth: int = len(self._stack)
+
+        if tag == "p":
+            for name in (SYNOPSIS_CLASS, COST_CLASS):
+                if name in self._sections and name in self._pending:
+                    self._paragraphs.setdefault(name, _Capture(depth))
+
+        for key, value in attrs:
+            if key != "class" or not value:
+                continue
+            for name in value.split():
+                if name not in self._pending or name in self._seen:
+                    continue
+                self._seen.add(name)
+                if void:
+                    self._store(name, "")
+                else:
+                    self._sections[name] = _Capture(depth)
+
+        if void and not self._pending:
+            raise _StopParsing
+
+    def handle_startendtag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        self.handle_starttag(tag, attrs, handle_void=False)
+        self.handle_endtag(tag)
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag in self._closed_void:
+            self._closed_void.remove(tag)
+            return
+        self._flush()
+        if tag not in self._stack:
+            return
+
+        # Like BeautifulSoup, an end tag closes everything opened after it
+        while self._stack:
+            closed: str = self._stack.pop()
+            self._count(closed, -1)
+            if closed == tag:
+                break
+        self._close_captures()
+
+    def handle_data(self, data: str) -> None:
+        self._data.append(data)
+
+    def handle_comment(self, data: str) -> None:
+        self._flush()
+
+    def handle_decl(self, decl: str) -> None:
+        self._flush()
+
+    def handle_pi(self, data: str) -> None:
+        self._flush()
+
+    def unknown_decl(self, data: str) -> None:
+        self._flush()
+        if data.startswith("CDATA["):
+            self._capture(data[len("CDATA[") :])
+
+    def _count(self, tag: str, step: int) -> None:
+        """Keep track of the open elements that change how text is read."""
+        if tag in HIDDEN_ELEMENTS:
+            self._hidden += step
+        elif tag in PRESERVE_WHITESPACE_ELEMENTS:
+            self._preserve += step
+
+    def _flush(self) -> None:
+        """
+        Add the text read since the last tag to the open captures.
+        Like BeautifulSoup, text that is only whitespace collapses to a single
+        newline or space.
+        """
+        if not self._data:
+            return
+        text: str = "".join(self._data)
+        self._data.clear()
+        if not self._preserve and not text.strip(ASCII_SPACES):
+            text = "\n" if "\n" in text else " "
+        self._capture(text)
+
+    def _capture(self, text: str) -> None:
+        """Add text to the open captures."""
+        if self._hidden:
+            return
+        extra_info: _Capture | None = self._sections.get(EXTRA_INFO_CLASS)
+        if extra_info is not None:
+            extra_info.parts.append(text)
+        for capture in self._paragraphs.values():
+            capture.parts.append(text)
+
+    def _close_captures(self) -> None:
+        """Store the text of the captures whose element was closed."""
+        depth: int = len(self._stack)
+
+        for name, capture in list(self._paragraphs.items()):
+            if capture.depth > depth:
+                del self._paragraphs[name]
+                self._store(name, "".join(capture.parts))
+
+        for name, capture in list(self._sections.items()):
+            if capture.depth > depth:
+                del self._sections[name]
+                # A section without paragraph has no text
+                self._store(name, "".join(capture.parts))
+
+        if not self._pending:
+            raise _StopParsing
+
+    def _store(self, name: str, text: str) -> None:
+        """Save the text of a section, if it wasn't already."""
+        if name not in self._pending:
+            return
+        self._pending.discard(name)
+        if name == SYNOPSIS_CLASS:
+            self.sections.synopsis = text
+        elif name == COST_CLASS:
+            self.sections.cost = text
+        else:
+            self.sections.extra_info = text
+
+    def finish(self) -> PageSections:
+        """Close the elements left open, like the end of the document."""
+        self._flush()
+        self._stack.clear()
+        self._hidden = 0
+        self._preserve = 0
+        if self._pending:
+            self._close_captures()
+        return self.sections
+
+
+def extract_sections(html: str) -> PageSections:
+    """Text of the sections of an event page."""
+    parser: SectionParser = SectionParser()
+    try:
+        parser.feed(html)
+        parser.close()
+        return parser.finish()
+    except _StopParsing:
+        return parser.sections
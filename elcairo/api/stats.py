@@ -0,0 +1,83 @@
+"""Timing counters for the scraping pipeline."""
+
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+
+
+@dataclass
+class StageStats:
+    """Counters of a single pipeline stage."""
+
+    calls: int = 0
+    failures: int = 0
+    cache_hits: int = 0
+    bytes: int = 0
+    seconds: float = 0.0
+    max_seconds: float = 0.0
+
+    @property
+    def mean_seconds(self) -> float:
+        """Average duration of a call."""
+        return self.seconds / self.calls if self.calls else 0.0
+
+
+class PipelineStats:
+    """
+    Thread safe per stage counters.
+    Durations are cumulative, when a stage runs in several threads at once its
+    seconds can add up to more than the wall time.
+    """
+
+    def __init__(self) -> None:
+        self.stages: dict[str, StageStats] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def measure(self, stage: str) -> Iterator[None]:
+        """Time the enclosed block, counting it as a failure if it raises."""
+        start: float = time.perf_counter()
+        failed: bool = False
+        try:
+            yield
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            self.record(stage, time.perf_counter() - start, failed)
+
+    def record(self, stage: str, seconds: float, failed: bool = False) -> None:
+        """Add a call to a stage."""
+        with self._lock:
+            stage_stats: StageStats = self.stages.setdefault(stage, StageStats())
+            stage_stats.calls += 1
+            stage_stats.seconds += seconds
+            stage_stats.max_seconds = max(stage_stats.max_seconds, seconds)
+            if failed:
+                stage_stats.failures += 1
+
+    def hit(self, stage: str) -> None:
+        """Count a call of a stage that was answered by the cache."""
+        with self._lock:
+            self.stages.setdefault(stage, StageStats()).cache_hits += 1
+
+    def add_bytes(self, stage: str, size: int) -> None:
+        """Count bytes transferred by a stage."""
+        with self._lock:
+            self.stages.setdefault(stage, StageStats()).bytes += size
+
+    def seconds(self, stage: str) -> float:
+        """Cumulative seconds spent in a stage."""
+        with self._lock:
+            stage_stats: StageStats | None = self.stages.get(stage)
+            return stage_stats.seconds if stage_stats is not None else 0.0
+
+    def summary(self) -> dict[str, dict]:
+        """Counters of every stage, with their mean duration."""
+        with self._lock:
+            return {
+                stage: {**asdict(stage_stats), "mean_seconds": stage_stats.mean_seconds}
+                for stage, stage_stats in self.stages.items()
+            }
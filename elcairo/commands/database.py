@@ -1,32 +1,25 @@
 """Database command group."""
 
-import shutil
+import cProfile
+import json
+import time
 from pathlib import Path
+from typing import TextIO
 
 import arrow
 import click
-import requests
 from halo import Halo
 
-from elcairo.api.elcairo import ElCairo, ElCairoEvent
-from elcairo.models import EventModel, db
-
-
-def download_image(url: str, uid: str, script_dir: Path) -> str:
-    """Download an image and returns the path to the file."""
-    file_path: Path = script_dir / "images" / f"{uid}.jpeg"
-    if file_path.exists():
-        return str(file_path)
-
-    try:
-        response: requests.Response = requests.get(url, stream=True, timeout=3)
-        response.raise_for_status()
-        with Path(file_path).open("wb") as image_file:
-            shutil.copyfileobj(response.raw, image_file)
-    except (requests.exceptions.RequestException, OSError):
-        return ""
-
-    return str(file_path)
+import elcairo.commands.lib.database_functions as database_functions
+import elcairo.settings as settings
+from elcairo.api.cache import CacheStats, HttpCache
+from elcairo.api.elcairo import CalEvent, ElCairo, ElCairoEvent, iter_months
+from elcairo.api.http import RateLimiter
+from elcairo.commands.lib.block_cache import BlockCache
+from elcairo.commands.lib.database_lock import DatabaseLock
+from elcairo.commands.lib.render_cache import RenderCache
+from elcairo.migrations import migrate_database, schema_version, set_journal_mode
+from elcairo.models import db
 
 
 @click.group()
@@ -40,95 +33,440 @@ def database(obj: dict, silent: bool) -> None:
 
 
 @database.command()
+@click.option(
+    "-w",
+    "--workers",
+    help="Number of event pages and images downloaded at once.",
+    type=click.IntRange(min=1),
+    default=8,
+    show_default=True,
+)
+@click.option(
+    "-c",
+    "--cache/--no-cache",
+    help="Revalidate cached responses instead of downloading them again.",
+    default=True,
+    show_default=True,
+)
+@click.option(
+    "-i",
+    "--incremental/--no-incremental",
+    help=(
+        "Only scrape events whose calendar entry changed and delete the "
+        "upcoming events that left the calendar."
+    ),
+    show_default=True,
+)
+@click.option(
+    "--stats/--no-stats",
+    help="Print the counters and timings of every stage of the run.",
+    show_default=True,
+)
+@click.option(
+    "--stats-json",
+    help="Write the counters and timings of every stage as JSON ('-' for stdout).",
+    type=click.File("w"),
+    default=None,
+)
+@click.option(
+    "--profile",
+    help="Dump a cProfile of the run (main thread only) to this file.",
+    type=click.Path(dir_okay=False, writable=True, path_type=Path),
+    default=None,
+)
 @click.pass_obj
-def populate(obj: dict) -> None:
-    """Populate the database."""
-    silent: bool = obj["silent"]
-
-    script_dir: Path = Path(__file__).parent.resolve()
-    lock_file: Path = script_dir / "db_lock_file"
-    if lock_file.exists():
-        if not silent:
-            click.echo("The database is being populated!")
-        raise click.exceptions.Exit(1)
+def populate(
+    obj: dict,
+    workers: int,
+    cache: bool,
+    incremental: bool,
+    stats: bool,
+    stats_json: TextIO | None,
+    profile: Path | None,
+) -> None:
+    """
+    Populate the database.
+    A full populate builds the new database in a copy of the current one and
+    copies it back at the end, shows keeps reading the previous events
+    meanwhile. An incremental populate writes its changes to the current
+    database in a single transaction.
+    """
+    # Progress output would be mixed with the JSON written to stdout
+    json_to_stdout: bool = getattr(stats_json, "name", None) == "<stdout>"
+    silent: bool = obj["silent"] or json_to_stdout
+
+    data_dir: Path = settings.data_dir()
+    lock: DatabaseLock = DatabaseLock(data_dir / "db_lock_file")
 
     spinner: Halo = Halo()
     if not silent:
         spinner.start("Locking database operations")
 
-    lock_file.touch()
+    if not lock.acquire():
+        if not silent:
+            spinner.fail(f"The database is being updated by process {lock.holder()}!")
+        raise click.exceptions.Exit(1)
 
-    image_dir: Path = script_dir / "images"
+    if not silent:
+        spinner.succeed()
+        if lock.stale_holder is not None:
+            spinner.warn(
+                f"Process {lock.stale_holder} died while holding the lock, "
+                "its work is discarded"
+            )
+
+    start: float = time.perf_counter()
+    profiler: cProfile.Profile | None = None
+    if profile is not None:
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    image_dir: Path = data_dir / "images"
     image_dir.mkdir(exist_ok=True)
 
-    database_file: Path = script_dir / "elcairo.db"
+    database_file: Path = data_dir / "elcairo.db"
 
-    if not silent:
-        spinner.succeed()
-        spinner.start(f"Connecting to the database ({database_file})")
+    try:
+        shadow_file: Path | None = None
+        if incremental:
+            db.init(database_file)
+        else:
+            if not silent:
+                spinner.start(f"Copying the database ({database_file})")
+            shadow_file = database_functions.create_shadow_database(database_file)
+            db.init(shadow_file)
+            if not silent:
+                spinner.succeed()
+        db.connect()
 
-    db.init(database_file)
-    db.connect()
+        if not silent:
+            spinner.start("Migrating tables")
 
-    if not silent:
-        spinner.succeed()
-        spinner.start("Creating table")
+        migrate_database()
 
-    db.create_tables([EventModel], safe=True)
+        if not silent:
+            spinner.succeed()
+            spinner.start("Fetching data")
 
-    if not silent:
-        spinner.succeed()
-        spinner.start("Fetching data")
+        http_cache: HttpCache | None = None
+        if cache:
+            http_cache = HttpCache(data_dir / "http_cache")
 
-    elcairo: ElCairo = ElCairo()
-    events_dict: dict[str, ElCairoEvent] = elcairo.get_upcoming_events_json()
+        elcairo: ElCairo = ElCairo(page_workers=workers, cache=http_cache)
+        now: arrow.Arrow = arrow.now()
+        calendar_events: set[CalEvent] = elcairo.get_upcoming_events()
 
-    if not silent:
-        spinner.succeed(f"Fetching data - Fetched: {len(events_dict)} events")
-        spinner.start("Creating events")
-
-    data_insert: list[dict] = []
-    for event_uid, elcairo_event in events_dict.items():
-        data_insert.append(
-            {
-                "uid": event_uid,
-                "name": elcairo_event.name,
-                "date": str(arrow.get(elcairo_event.date)),
-                "compare_date": int(
-                    arrow.get(elcairo_event.date).format("YYYYMMDDHHmm")
-                ),
-                "synopsis": elcairo_event.synopsis,
-                "direction": elcairo_event.extra_info.direction,
-                "cast": elcairo_event.extra_info.cast,
-                "genre": elcairo_event.extra_info.genre,
-                "duration": elcairo_event.extra_info.duration,
-                "origin": elcairo_event.extra_info.origin,
-                "year": elcairo_event.extra_info.year,
-                "age": elcairo_event.extra_info.age,
-                "cost": elcairo_event.cost,
-                "image_path": download_image(
-                    elcairo_event.image_url, event_uid, script_dir
-                ),
-                "image_url": elcairo_event.image_url,
-                "url": elcairo_event.url,
-            }
+        scrape_events: set[CalEvent] = calendar_events
+        if incremental:
+            scrape_events = database_functions.changed_events(calendar_events)
+
+        events_dict: dict[str, ElCairoEvent] = elcairo.ics_events_to_elcairo_events(
+            scrape_events
+        )
+
+        if not silent:
+            spinner.succeed(
+                f"Fetching data - Fetched: {len(calendar_events)} events, "
+                f"Scraped: {len(events_dict)} events"
+            )
+            spinner.info(
+                "Scraping pages - "
+                f"Network: {elcairo.stats.seconds('page_fetch'):.2f}s, "
+                f"Parsing: {elcairo.stats.seconds('page_parse'):.2f}s, "
+                f"Extracting: {elcairo.stats.seconds('page_extract'):.2f}s "
+                "(cumulative across workers)"
+            )
+            spinner.start("Creating events")
+
+        image_paths: dict[str, str] = database_functions.download_images(
+            {elcairo_event.image_url for elcairo_event in events_dict.values()},
+            image_dir,
+            elcairo.session,
+            workers,
+            elcairo.stats,
+        )
+
+        data_insert: list[dict] = [
+            database_functions.create_event_row(
+                event_uid,
+                elcairo_event,
+                image_paths.get(elcairo_event.image_url, ""),
+            )
+            for event_uid, elcairo_event in events_dict.items()
+        ]
+
+        if not silent:
+            spinner.succeed()
+            spinner.start("Populating the table")
+
+        deleted: int = 0
+        # An event missing from a month that failed to download is not gone
+        delete_missing: bool = (
+            incremental and bool(calendar_events) and not elcairo.failed_months
         )
+        with elcairo.stats.measure("db_write"), db.atomic():
+            database_functions.upsert_events(data_insert)
+            if delete_missing:
+                deleted = database_functions.delete_missing_events(calendar_events, now)
+            # Posters of versions before the content addressed store
+            database_functions.migrate_legacy_images(image_dir)
+
+        db.close()
+
+        if not silent:
+            spinner.succeed(
+                f"Populating the table - Upserted: {len(data_insert)} events, "
+                f"Deleted: {deleted} events"
+            )
+            if incremental and elcairo.failed_months:
+                months: str = ", ".join(
+                    f"{year}-{month:02}" for year, month in elcairo.failed_months
+                )
+                spinner.warn(f"Could not download {months}, no events were deleted")
+
+        if shadow_file is not None:
+            if not silent:
+                spinner.start("Replacing the database")
+            with elcairo.stats.measure("db_swap"):
+                database_functions.swap_database(shadow_file, database_file)
+            if not silent:
+                spinner.succeed()
+
+        if not silent:
+            spinner.start("Unlocking database operations")
+    finally:
+        # A failed run is profiled too
+        if profiler is not None and profile is not None:
+            profiler.disable()
+            profiler.dump_stats(profile)
+        if not db.is_closed():
+            db.close()
+        lock.release()
 
     if not silent:
         spinner.succeed()
-        spinner.start("Populating the table")
+        spinner.stop()
+        click.echo("Done!")
+
+    wall_seconds: float = time.perf_counter() - start
+    if stats:
+        click.echo(
+            database_functions.format_stats(elcairo.stats, wall_seconds),
+            err=json_to_stdout,
+        )
+    if stats_json is not None:
+        json.dump(
+            {"wall_seconds": wall_seconds, "stages": elcairo.stats.summary()},
+            stats_json,
+            indent=2,
+        )
+        stats_json.write("\n")
 
-    EventModel.insert_many(data_insert).on_conflict("replace").execute()
-    db.close()
+
+@database.command()
+@click.option(
+    "-w",
+    "--workers",
+    help="Number of event pages and images downloaded at once.",
+    type=click.IntRange(min=1),
+    default=4,
+    show_default=True,
+)
+@click.option(
+    "-r",
+    "--rate",
+    help="Maximum number of requests started per second.",
+    type=click.FloatRange(min=0, min_open=True),
+    default=2.0,
+    show_default=True,
+)
+@click.option(
+    "-e",
+    "--max-errors",
+    help="Stop after this many months in a row fail to download.",
+    type=click.IntRange(min=1),
+    default=3,
+    show_default=True,
+)
+@click.option(
+    "--images/--no-images",
+    help="Download the posters of the archived events.",
+    default=True,
+    show_default=True,
+)
+@click.pass_obj
+def archive(
+    obj: dict, workers: int, rate: float, max_errors: int, images: bool
+) -> None:
+    """
+    Store the past events, month by month backwards.
+    Every finished month is checkpointed, an interrupted archive resumes from
+    the first month not stored. The current month is archived again on every
+    run since it keeps getting past events.
+    """
+    silent: bool = obj["silent"]
+
+    data_dir: Path = settings.data_dir()
+    lock: DatabaseLock = DatabaseLock(data_dir / "db_lock_file")
+    if not lock.acquire():
+        if not silent:
+            click.echo(f"The database is being updated by process {lock.holder()}!")
+        raise click.exceptions.Exit(1)
+
+    spinner: Halo = Halo()
+    try:
+        image_dir: Path = data_dir / "images"
+        image_dir.mkdir(exist_ok=True)
+
+        # Months are committed one at a time in the live database, readers see
+        # the archive grow
+        database_file: Path = data_dir / "elcairo.db"
+        db.init(database_file)
+        db.connect()
+        migrate_database()
+
+        # Calendars, event pages and posters share the budget of --rate
+        limiter: RateLimiter = RateLimiter(1 / rate)
+        elcairo: ElCairo = ElCairo(
+            month_workers=1,
+            page_workers=workers,
+            cache=HttpCache(data_dir / "http_cache"),
+            limiter=limiter,
+        )
+
+        now: arrow.Arrow = arrow.now()
+        current_month: str = database_functions.month_key(now.year, now.month)
+        archived: dict[str, int] = database_functions.archived_months()
+        errors: int = 0
+
+        for year, month in iter_months(now.year, now.month, -1):
+            key: str = database_functions.month_key(year, month)
+
+            if key in archived and key != current_month:
+                if archived[key] == 0:
+                    break
+                continue
+
+            if not silent:
+                spinner.start(f"Archiving {key}")
+
+            calendar_events, error = elcairo.fetch_month(year, month)
+            if error:
+                errors += 1
+                if not silent:
+                    spinner.fail(f"Archiving {key} - Could not fetch the month")
+                if errors >= max_errors:
+                    if not silent:
+                        click.echo("Too many errors, run archive again to resume.")
+                    raise click.exceptions.Exit(1)
+                continue
+            errors = 0
+
+            past_events: set[CalEvent] = {
+                event
+                for event in calendar_events
+                if event.begin is not None and event.begin <= now
+            }
+            events_dict: dict[str, ElCairoEvent] = elcairo.ics_events_to_elcairo_events(
+                past_events
+            )
+
+            image_paths: dict[str, str] = {}
+            if images:
+                image_paths = database_functions.download_images(
+                    {event.image_url for event in events_dict.values()},
+                    image_dir,
+                    elcairo.session,
+                    workers,
+                    limiter=limiter,
+                )
+
+            data_insert: list[dict] = [
+                database_functions.create_event_row(
+                    event_uid,
+                    elcairo_event,
+                    image_paths.get(elcairo_event.image_url, ""),
+                )
+                for event_uid, elcairo_event in events_dict.items()
+            ]
+            # The empty month that ends the schedule is checkpointed too
+            if key != current_month:
+                database_functions.archive_month(key, data_insert)
+            else:
+                with db.atomic():
+                    database_functions.upsert_events(data_insert)
+
+            if not silent:
+                spinner.succeed(f"Archiving {key} - Stored: {len(data_insert)} events")
+
+            if not calendar_events:
+                break
+    finally:
+        if not db.is_closed():
+            db.close()
+        lock.release()
 
     if not silent:
-        spinner.succeed()
-        spinner.start("Unlocking database operations")
+        spinner.stop()
+        click.echo("Done!")
+
+
+@database.command(name="migrate")
+@click.option(
+    "-j",
+    "--journal-mode",
+    type=click.Choice(["wal", "delete"], case_sensitive=False),
+    default=None,
+    help=(
+        "Switch the journal mode of the database file. In wal mode shows never "
+        "blocks on a running populate. [default: unchanged]"
+    ),
+)
+@click.pass_obj
+def migrate_command(obj: dict, journal_mode: str | None) -> None:
+    """Upgrade the database schema."""
+    silent: bool = obj["silent"]
+
+    data_dir: Path = settings.data_dir()
+    database_file: Path = data_dir / "elcairo.db"
+    if not database_file.exists():
+        if not silent:
+            click.echo("Create the database first!")
+        raise click.exceptions.Exit(1)
+
+    lock: DatabaseLock = DatabaseLock(data_dir / "db_lock_file")
+    if not lock.acquire():
+        if not silent:
+            click.echo(f"The database is being updated by process {lock.holder()}!")
+        raise click.exceptions.Exit(1)
+
+    spinner: Halo = Halo()
+    try:
+        if not silent:
+            spinner.start("Migrating tables")
 
-    lock_file.unlink()
+        db.init(database_file)
+        db.connect()
+        applied: int = migrate_database()
+
+        if not silent:
+            spinner.succeed(
+                f"Migrating tables - Applied: {applied} migrations, "
+                f"Schema version: {schema_version()}"
+            )
+
+        if journal_mode is not None:
+            if not silent:
+                spinner.start("Switching journal mode")
+            mode: str = set_journal_mode(journal_mode)
+            if not silent:
+                spinner.succeed(f"Switching journal mode - Journal mode: {mode}")
+    finally:
+        if not db.is_closed():
+            db.close()
+        lock.release()
 
     if not silent:
-        spinner.succeed()
         spinner.stop()
         click.echo("Done!")
 
@@ -142,24 +480,80 @@ def populate(obj: dict) -> None:
 )
 @click.pass_obj
 def clean(obj: dict, force: bool) -> None:
-    """Clean the database."""
+    """
+    Clean the database.
+    If another process is updating the database, clean waits for it to
+    finish.
+    """
     silent: bool = obj["silent"]
 
-    script_dir: Path = Path(__file__).parent.resolve()
-    lock_file: Path = script_dir / "db_lock_file"
-    if lock_file.exists() and not force:
-        click.confirm(
-            "It seems that the database is being populated. Continue?", abort=True
+    data_dir: Path = settings.data_dir()
+    lock: DatabaseLock = DatabaseLock(data_dir / "db_lock_file")
+    spinner: Halo = Halo()
+    if not lock.acquire():
+        holder: int | None = lock.holder()
+        if not force:
+            click.confirm(
+                f"The database is being updated by process {holder}. "
+                "Wait for it to finish?",
+                abort=True,
+            )
+        if not silent:
+            spinner.start(f"Waiting for process {holder}")
+        lock.acquire(wait=True)
+        if not silent:
+            spinner.succeed()
+
+    try:
+        if not silent:
+            spinner.start("Cleaning database")
+
+        database_file: Path = data_dir / "elcairo.db"
+
+        database_functions.remove_database(database_file)
+        database_functions.remove_database(
+            database_functions.shadow_path(database_file)
         )
+        database_functions.remove_legacy_images(data_dir / "images")
+        RenderCache(data_dir / "render_cache").clear()
+        BlockCache(data_dir / "block_cache.db").clear()
+    finally:
+        lock.release()
 
-    spinner: Halo = Halo()
     if not silent:
-        spinner.start("Cleaning database")
+        spinner.succeed()
+        spinner.stop()
+        click.echo("Done!")
+
+
+@database.group()
+def cache() -> None:
+    """HTTP cache operations."""
+
 
-    database_file: Path = script_dir / "elcairo.db"
+@cache.command()
+def stats() -> None:
+    """Show the size of the HTTP cache."""
+    data_dir: Path = settings.data_dir()
+    cache_stats: CacheStats = HttpCache(data_dir / "http_cache").stats()
+
+    click.echo(f"Entries: {cache_stats.entries}")
+    click.echo(f"Size: {cache_stats.size / 1024 / 1024:.2f} MiB")
+    click.echo(f"Max size: {cache_stats.max_size / 1024 / 1024:.2f} MiB")
+
+
+@cache.command(name="clear")
+@click.pass_obj
+def cache_clear(obj: dict) -> None:
+    """Remove every cached response."""
+    silent: bool = obj["silent"]
+
+    spinner: Halo = Halo()
+    if not silent:
+        spinner.start("Clearing HTTP cache")
 
-    lock_file.unlink(missing_ok=True)
-    database_file.unlink(missing_ok=True)
+    data_dir: Path = settings.data_dir()
+    HttpCache(data_dir / "http_cache").clear()
 
     if not silent:
         spinner.succeed()
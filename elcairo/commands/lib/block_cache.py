@@ -0,0 +1,123 @@
+"""Cache of events already formatted for the terminal."""
+
+import hashlib
+import json
+import sqlite3
+from pathlib import Path
+
+# Blocks kept besides those of the last listing, the least recently used
+# are evicted first
+MAX_ENTRIES = 4096
+# Seconds to wait for another run writing the cache
+BUSY_TIMEOUT = 1.0
+
+
+class BlockCache:
+    """
+    Formatted event blocks stored in a small SQLite table, a listing only
+    reads the blocks of the events it prints. The blocks added and the use of
+    the loaded ones are written by save, in a single transaction.
+    The cache grows to hold a listing longer than max_entries, so the next
+    run of the same listing finds every block.
+    Blocks are keyed by everything they are formatted from, an event whose
+    data changed has a different key.
+    The cache is best effort, if its file can't be used nothing is cached.
+    """
+
+    def __init__(self, path: Path, max_entries: int = MAX_ENTRIES) -> None:
+        self.path = path
+        self.max_entries = max_entries
+        self._connection: sqlite3.Connection | None = None
+        self._broken: bool = False
+        self._added: dict[str, str] = {}
+        self._used: list[str] = []
+
+    def load(self, key: str) -> list | None:
+        """Block stored under key."""
+        connection: sqlite3.Connection | None = self._connect()
+        if connection is None:
+            return None
+
+        digest: str = self._digest(key)
+        try:
+            row: tuple | None = connection.execute(
+                "SELECT block FROM blocks WHERE key = ?", (digest,)
+            ).fetchone()
+        except sqlite3.Error:
+            return None
+        if row is None:
+            return None
+
+        self._used.append(digest)
+        return json.loads(row[0])
+
+    def store(self, key: str, block: list) -> None:
+        """Save a block under key when save is called."""
+        self._added[self._digest(key)] = json.dumps(block, ensure_ascii=False)
+
+    def save(self) -> None:
+        """Write the added blocks and evict the least recently used ones."""
+        connection: sqlite3.Connection | None = self._connect()
+        if connection is None or not (self._added or self._used):
+            return
+
+        try:
+            with connection:
+                (last_use,) = connection.execute(
+                    "SELECT coalesce(max(used), 0) + 1 FROM blocks"
+                ).fetchone()
+                connection.executemany(
+                    "UPDATE blocks SET used = ? WHERE key = ?",
+                    ((last_use, digest) for digest in self._used),
+                )
+                connection.executemany(
+                    "INSERT OR REPLACE INTO blocks (key, block, used) VALUES (?, ?, ?)",
+                    (
+                        (digest, block, last_use)
+                        for digest, block in self._added.items()
+                    ),
+                )
+                connection.execute(
+                    "DELETE FROM blocks WHERE key IN "
+                    "(SELECT key FROM blocks ORDER BY used DESC LIMIT -1 OFFSET ?)",
+                    (max(self.max_entries, len(self._used) + len(self._added)),),
+                )
+        except sqlite3.Error:
+            pass
+        self._added.clear()
+        self._used.clear()
+
+    def clear(self) -> None:
+        """Remove every block."""
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+        self.path.unlink(missing_ok=True)
+        self.path.with_name(f"{self.path.name}-journal").unlink(missing_ok=True)
+        self._added.clear()
+        self._used.clear()
+
+    def _connect(self) -> sqlite3.Connection | None:
+        """Connection to the cache, None if it can't be opened."""
+        if self._connection is None and not self._broken:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                connection = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT)
+                # Losing the last blocks added on a crash only costs formatting
+                connection.execute("PRAGMA synchronous = OFF")
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS blocks ("
+                    "key TEXT PRIMARY KEY, block TEXT NOT NULL, used INTEGER NOT NULL)"
+                )
+                connection.execute(
+                    "CREATE INDEX IF NOT EXISTS blocks_used ON blocks (used)"
+                )
+            except (OSError, sqlite3.Error):
+                self._broken = True
+                return None
+            self._connection = connection
+        return self._connection
+
+    @staticmethod
+    def _digest(key: str) -> str:
+        return hashlib.sha256(key.encode()).hexdigest()
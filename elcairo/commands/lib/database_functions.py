@@ -0,0 +1,302 @@
+"""Functions used in the database command."""
+
+import hashlib
+import re
+import shutil
+import sqlite3
+import threading
+import urllib.parse
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from pathlib import Path
+
+import arrow
+import requests
+from peewee import chunked
+
+from elcairo.api.elcairo import CalEvent, ElCairoEvent
+from elcairo.api.http import RateLimiter
+from elcairo.api.stats import PipelineStats
+from elcairo.models import ArchiveMonthModel, EventModel, db
+
+INSERT_BATCH_SIZE = 50
+IMAGE_SUFFIXES = (".jpeg", ".jpg", ".png", ".webp")
+# Name of a content addressed image, without its suffix
+IMAGE_HASH_RE = re.compile(r"[0-9a-f]{64}")
+SHADOW_SUFFIX = ".new"
+# Files SQLite keeps next to a database
+SQLITE_SIDE_SUFFIXES = ("-wal", "-shm", "-journal")
+# Seconds the swap waits for a reader that blocks the live database
+SWAP_TIMEOUT = 10.0
+
+
+def create_event_row(uid: str, elcairo_event: ElCairoEvent, image_path: str) -> dict:
+    """Row of the events table for an event."""
+    return {
+        "uid": uid,
+        "name": elcairo_event.name,
+        "date": str(arrow.get(elcairo_event.date)),
+        "compare_date": int(arrow.get(elcairo_event.date).format("YYYYMMDDHHmm")),
+        "synopsis": elcairo_event.synopsis,
+        "direction": elcairo_event.extra_info.direction,
+        "cast": elcairo_event.extra_info.cast,
+        "genre": elcairo_event.extra_info.genre,
+        "duration": elcairo_event.extra_info.duration,
+        "origin": elcairo_event.extra_info.origin,
+        "year": elcairo_event.extra_info.year,
+        "age": elcairo_event.extra_info.age,
+        "cost": elcairo_event.cost,
+        "image_path": image_path,
+        "image_url": elcairo_event.image_url,
+        "url": elcairo_event.url,
+        "content_hash": elcairo_event.content_hash,
+    }
+
+
+def changed_events(events: set[CalEvent]) -> set[CalEvent]:
+    """Events that are new or whose calendar entry changed since stored."""
+    stored_hashes: dict[str, str] = dict(
+        EventModel.select(EventModel.uid, EventModel.content_hash).tuples()
+    )
+    return {
+        event for event in events if stored_hashes.get(event.uid) != event.content_hash
+    }
+
+
+def upsert_events(rows: list[dict]) -> None:
+    """
+    Insert new events and update the changed ones keeping their event_id.
+    Call it inside a transaction so the batches are written at once.
+    """
+    preserve: list = [
+        field
+        for field in EventModel._meta.sorted_fields
+        if field.name not in ("event_id", "uid")
+    ]
+    for batch in chunked(rows, INSERT_BATCH_SIZE):
+        EventModel.insert_many(batch).on_conflict(
+            conflict_target=[EventModel.uid], preserve=preserve
+        ).execute()
+
+
+def delete_missing_events(events: set[CalEvent], since: arrow.Arrow) -> int:
+    """
+    Delete the stored events from since onwards that are no longer in the
+    calendar. Returns the number of deleted events.
+    """
+    uids: list[str] = [event.uid for event in events]
+    return (
+        EventModel.delete()
+        .where(
+            EventModel.compare_date >= int(since.format("YYYYMMDDHHmm")),
+            EventModel.uid.not_in(uids),
+        )
+        .execute()
+    )
+
+
+def image_file_path(url: str, image_dir: Path) -> Path:
+    """
+    Content addressed path of an image: the name is the hash of its url, so
+    every event with the same poster shares a single file.
+    """
+    suffix: str = Path(urllib.parse.urlsplit(url).path).suffix.lower()
+    if suffix not in IMAGE_SUFFIXES:
+        suffix = ".jpeg"
+    return image_dir / f"{hashlib.sha256(url.encode()).hexdigest()}{suffix}"
+
+
+def download_image(
+    url: str,
+    image_dir: Path,
+    session: requests.Session,
+    stats: PipelineStats | None = None,
+    limiter: RateLimiter | None = None,
+) -> str:
+    """
+    Download an image and returns the path to the file.
+    With stats, the download is measured as the image_download stage and an
+    image already on disk counts as a cache hit. With limiter, the download
+    waits for its turn, images already on disk don't.
+    """
+    stats = stats or PipelineStats()
+    file_path: Path = image_file_path(url, image_dir)
+    if file_path.exists():
+        stats.hit("image_download")
+        return str(file_path)
+
+    if limiter is not None:
+        limiter.wait()
+
+    tmp_path: Path = file_path.with_name(
+        f"{file_path.name}.part{threading.get_ident()}"
+    )
+    try:
+        with (
+            stats.measure("image_download"),
+            session.get(url, stream=True, timeout=3) as response,
+        ):
+            response.raise_for_status()
+            with tmp_path.open("wb") as image_file:
+                shutil.copyfileobj(response.raw, image_file)
+        stats.add_bytes("image_download", tmp_path.stat().st_size)
+        tmp_path.replace(file_path)
+    except (requests.exceptions.RequestException, OSError):
+        tmp_path.unlink(missing_ok=True)
+        return ""
+
+    return str(file_path)
+
+
+def download_images(
+    urls: set[str],
+    image_dir: Path,
+    session: requests.Session,
+    workers: int,
+    stats: PipelineStats | None = None,
+    limiter: RateLimiter | None = None,
+) -> dict[str, str]:
+    """
+    Download the images concurrently, each distinct url once.
+    Returns the path of every url that could be downloaded.
+    """
+    pending: list[str] = [url for url in urls if url]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        paths: Iterator[str] = executor.map(
+            lambda url: download_image(url, image_dir, session, stats, limiter),
+            pending,
+        )
+        return {url: path for url, path in zip(pending, paths, strict=True) if path}
+
+
+def is_legacy_image(path: Path) -> bool:
+    """Whether an image is named after the uid of its event, the old layout."""
+    return path.suffix in IMAGE_SUFFIXES and not IMAGE_HASH_RE.fullmatch(path.stem)
+
+
+def remove_legacy_images(image_dir: Path) -> int:
+    """Remove the images of the old layout, returns how many."""
+    removed: int = 0
+    for path in image_dir.glob("*"):
+        if path.is_file() and is_legacy_image(path):
+            path.unlink(missing_ok=True)
+            removed += 1
+    return removed
+
+
+def migrate_legacy_images(image_dir: Path) -> int:
+    """
+    Move the images of the old layout to their content addressed path,
+    pointing the events to it, and remove the ones no event uses.
+    Returns the number of images moved or removed.
+    """
+    changed: int = 0
+    rows = EventModel.select(
+        EventModel.event_id, EventModel.image_url, EventModel.image_path
+    ).tuples()
+    for event_id, image_url, image_path in list(rows):
+        if not image_url or not image_path or not is_legacy_image(Path(image_path)):
+            continue
+
+        legacy_path: Path = image_dir / Path(image_path).name
+        new_path: Path = image_file_path(image_url, image_dir)
+        if not new_path.exists():
+            if not legacy_path.exists():
+                continue
+            legacy_path.replace(new_path)
+            changed += 1
+
+        EventModel.update(image_path=str(new_path)).where(
+            EventModel.event_id == event_id
+        ).execute()
+
+    return changed + remove_legacy_images(image_dir)
+
+
+def format_stats(stats: PipelineStats, wall_seconds: float) -> str:
+    """Table with the counters of every stage of a run."""
+    lines: list[str] = [
+        f"{'Stage':<14}{'Calls':>7}{'Fails':>7}{'Hits':>7}"
+        f"{'KiB':>10}{'Total s':>10}{'Mean ms':>10}{'Max ms':>10}"
+    ]
+    for stage, counters in stats.summary().items():
+        lines.append(
+            f"{stage:<14}{counters['calls']:>7}{counters['failures']:>7}"
+            f"{counters['cache_hits']:>7}{counters['bytes'] / 1024:>10.1f}"
+            f"{counters['seconds']:>10.2f}{counters['mean_seconds'] * 1000:>10.1f}"
+            f"{counters['max_seconds'] * 1000:>10.1f}"
+        )
+    lines.append(
+        f"Wall time: {wall_seconds:.2f}s (stage seconds add up across threads)"
+    )
+    return "\n".join(lines)
+
+
+def month_key(year: int, month: int) -> str:
+    """Key of a month in the archive checkpoints."""
+    return f"{str(year).zfill(4)}-{str(month).zfill(2)}"
+
+
+def archived_months() -> dict[str, int]:
+    """Number of events of every month already archived."""
+    return dict(
+        ArchiveMonthModel.select(
+            ArchiveMonthModel.month, ArchiveMonthModel.events
+        ).tuples()
+    )
+
+
+def archive_month(key: str, rows: list[dict]) -> None:
+    """Store the events of a month together with its checkpoint."""
+    with db.atomic():
+        upsert_events(rows)
+        ArchiveMonthModel.insert(
+            month=key, events=len(rows), archived_at=str(arrow.now())
+        ).on_conflict("replace").execute()
+
+
+def remove_database(database_file: Path) -> None:
+    """Remove a database file together with its journal files."""
+    database_file.unlink(missing_ok=True)
+    for suffix in SQLITE_SIDE_SUFFIXES:
+        database_file.with_name(f"{database_file.name}{suffix}").unlink(missing_ok=True)
+
+
+def shadow_path(database_file: Path) -> Path:
+    """Path of the database in which the next version of database_file is built."""
+    return database_file.with_name(f"{database_file.name}{SHADOW_SUFFIX}")
+
+
+def create_shadow_database(database_file: Path) -> Path:
+    """
+    Copy of the live database in which the next one is built, readers keep
+    using the live one meanwhile. The leftovers of an interrupted build are
+    removed first.
+    """
+    shadow_file: Path = database_file.with_name(f"{database_file.name}{SHADOW_SUFFIX}")
+    remove_database(shadow_file)
+    if database_file.exists():
+        with (
+            closing(sqlite3.connect(database_file)) as live,
+            closing(sqlite3.connect(shadow_file)) as shadow,
+        ):
+            live.backup(shadow)
+    return shadow_file
+
+
+def swap_database(shadow_file: Path, database_file: Path) -> None:
+    """
+    Copy the shadow database, which must be closed, into the live one and
+    remove it. Call it holding the database lock.
+    The copy is a single transaction of the backup API, so readers see either
+    the previous events or the new ones. The live file is never replaced: a
+    rename would leave the readers, and the write ahead log, of the previous
+    file behind.
+    """
+    with (
+        closing(sqlite3.connect(database_file, timeout=SWAP_TIMEOUT)) as live,
+        closing(sqlite3.connect(shadow_file)) as shadow,
+    ):
+        shadow.backup(live)
+    remove_database(shadow_file)
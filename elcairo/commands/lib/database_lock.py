@@ -0,0 +1,55 @@
+"""Lock that keeps the commands writing the database from running at once."""
+
+import fcntl
+import os
+from pathlib import Path
+
+
+class DatabaseLock:
+    """
+    Exclusive advisory lock on a file, taken with fcntl.flock.
+    The kernel releases the lock when its holder exits, even if it crashes,
+    so a lock file left behind never blocks anything. The holder writes its
+    pid in the file and erases it when it releases the lock, a pid found when
+    acquiring belongs to a holder that died without releasing it.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        # Pid of the last holder if it died holding the lock
+        self.stale_holder: int | None = None
+        self._fd: int | None = None
+
+    def acquire(self, wait: bool = False) -> bool:
+        """
+        Take the lock, False if another process holds it. With wait, block
+        until the other process releases it instead.
+        """
+        fd: int = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX if wait else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+
+        self.stale_holder = self.holder()
+        os.ftruncate(fd, 0)
+        os.write(fd, f"{os.getpid()}\n".encode())
+        self._fd = fd
+        return True
+
+    def release(self) -> None:
+        """Release the lock if it is held."""
+        if self._fd is None:
+            return
+        os.ftruncate(self._fd, 0)
+        fcntl.flock(self._fd, fcntl.LOCK_UN)
+        os.close(self._fd)
+        self._fd = None
+
+    def holder(self) -> int | None:
+        """Pid written in the lock file, None if there is none."""
+        try:
+            return int(self.path.read_text().strip())
+        except (OSError, ValueError):
+            return None
@@ -2,21 +2,60 @@
 
 import os
 import shutil
-import subprocess
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import astuple, dataclass
 
 import arrow
 import click
 from arrow import Arrow
-from PIL import Image
+from click.globals import resolve_color_default
 
-from elcairo.api.elcairo import ElCairoEvent
+from elcairo.api.events import ElCairoEvent
+from elcairo.commands.lib.block_cache import BlockCache
+from elcairo.commands.lib.render_cache import RenderCache
 
 DEFAULT = "[Nothing to show...]"
 WIDTH = 120
+# Characters buffered before an intermediate flush of a long listing
+FLUSH_SIZE = 1024 * 1024
+# Images rendered at once, the renderers mostly wait on their processes, and
+# how many events ahead of the printed one they are rendered
+RENDER_WORKERS = min(8, (os.cpu_count() or 1) + 4)
+RENDER_AHEAD = RENDER_WORKERS * 2
+# Escape codes around the title's date, it is styled when printed
+DATE_STYLE_START, DATE_STYLE_END = click.style(
+    "\0", fg="blue", bold=True, underline=True
+).split("\0")
+
+# ASCII density ramp: darkest → lightest
+ASCII_RAMP = " .'`^\",:;Il!i><~+_-?][}{1)(|\\/tfjrxnuvczXYUJCLQ0OZmwqpdbkhao*#MW&8%B@$"
+# Maps every grayscale byte to the byte of its ramp character
+ASCII_RAMP_TABLE = bytes(
+    ord(ASCII_RAMP[int(pixel / 255 * (len(ASCII_RAMP) - 1))]) for pixel in range(256)
+)
+# Levels of the 6x6x6 color cube and of the gray ramp of 256 color terminals,
+# the colors from 16 onwards, which don't depend on the terminal theme
+CUBE_LEVELS = (0, 95, 135, 175, 215, 255)
+XTERM_COLORS: tuple[tuple[int, int, int], ...] = (
+    *((r, g, b) for r in CUBE_LEVELS for g in CUBE_LEVELS for b in CUBE_LEVELS),
+    *((8 + 10 * gray,) * 3 for gray in range(24)),
+)
+# Escape code of every palette index as foreground, and as background
+# followed by the upper half block
+FG_ESCAPES: tuple[str, ...] = tuple(
+    f"\x1b[38;5;{16 + index}m" for index in range(len(XTERM_COLORS))
+)
+BG_ESCAPES: tuple[str, ...] = tuple(
+    f"\x1b[48;5;{16 + index}m\u2580" for index in range(len(XTERM_COLORS))
+)
+# Upper half block with 24 bit foreground and background colors
+TRUECOLOR_CELL = "\x1b[38;2;{};{};{}m\x1b[48;2;{};{};{}m\u2580"
 
 RENDERERS: dict[str, str] = {
     "wezterm": "wezterm imgcat --width {width}",
-    "chafa": "chafa --size={width}x",
+    "chafa": "chafa --format={format} --colors={colors} --size={width}x",
     "catimg": "catimg -w {width}",
     "jp2a": "jp2a --width={width}",
 }
@@ -35,32 +74,115 @@ def detect_renderer() -> str:
     return "builtin"
 
 
-def builtin_ascii_render(image_path: str) -> None:
-    """Render an image as ASCII art using Pillow. Always available as fallback."""
-
-    # ASCII density ramp: darkest → lightest
-    ramp = " .'`^\",:;Il!i><~+_-?][}{1)(|\\/tfjrxnuvczXYUJCLQ0OZmwqpdbkhao*#MW&8%B@$"
+def terminal_options() -> dict[str, str]:
+    """
+    Image format and colors of the terminal, for the renderers that detect
+    them from a TTY and only see a pipe when rendering.
+    """
+    term: str = os.getenv("TERM", "")
+    if "kitty" in term:
+        image_format = "kitty"
+    elif os.getenv("TERM_PROGRAM") in ("iTerm.app", "WezTerm"):
+        image_format = "iterm"
+    else:
+        image_format = "symbols"
+
+    if os.getenv("COLORTERM") in ("truecolor", "24bit"):
+        colors = "full"
+    elif "256color" in term:
+        colors = "256"
+    else:
+        colors = "16"
+    return {"format": image_format, "colors": colors}
+
+
+def builtin_ascii_render(
+    image_path: str, color: bool = False, truecolor: bool = False
+) -> str | None:
+    """
+    Render an image as ASCII art using Pillow. Always available as fallback.
+    With color the image is drawn with half blocks instead, each character
+    covering two pixel rows, in truecolor if truecolor is set and otherwise
+    with the 256 color palette.
+    Returns None if the image can't be opened.
+    """
+    # Pillow is only needed here, importing it lazily keeps startup fast
+    from PIL import Image
 
     try:
         img = Image.open(image_path).convert("RGB")
     except Exception:
-        click.echo(f"Could not open image: {image_path}")
-        return
+        return None
 
     # ASCII chars are roughly twice as tall as wide, so halve the row count
     char_width = WIDTH
     aspect = img.height / img.width
     char_height = max(1, int(char_width * aspect * 0.45))
 
-    img = img.resize((char_width, char_height))
-    gray = img.convert("L")
+    if color and truecolor:
+        rgb: bytes = img.resize((char_width, char_height * 2)).tobytes()
+        return truecolor_half_block_rows(rgb, char_width, char_height)
+
+    if color:
+        palette = Image.new("P", (1, 1))
+        palette.putpalette([level for rgb in XTERM_COLORS for level in rgb])
+        indexes: bytes = (
+            img.resize((char_width, char_height * 2))
+            .quantize(palette=palette, dither=Image.Dither.NONE)
+            .tobytes()
+        )
+        return half_block_rows(indexes, char_width, char_height)
+
+    # The whole grayscale buffer is mapped to the ramp in one translate call
+    gray: bytes = img.resize((char_width, char_height)).convert("L").tobytes()
+    art: str = gray.translate(ASCII_RAMP_TABLE).decode("ascii")
+
+    return "".join(
+        f"{art[start : start + char_width]}\n"
+        for start in range(0, len(art), char_width)
+    )
 
-    for y in range(char_height):
-        row = ""
-        for x in range(char_width):
-            pixel = gray.getpixel((x, y))
-            row += ramp[int(pixel / 255 * (len(ramp) - 1))]
-        click.echo(row)
+
+def half_block_rows(indexes: bytes, width: int, height: int) -> str:
+    """
+    Draw a buffer of width x (height * 2) XTERM_COLORS indexes as height rows
+    of upper half blocks, the foreground is the upper pixel and the background
+    the lower one. The escape codes come from the precomputed tables.
+    """
+    rows: list[str] = []
+    for y in range(height):
+        upper: bytes = indexes[2 * y * width : (2 * y + 1) * width]
+        lower: bytes = indexes[(2 * y + 1) * width : (2 * y + 2) * width]
+        cells = map(
+            str.__add__,
+            map(FG_ESCAPES.__getitem__, upper),
+            map(BG_ESCAPES.__getitem__, lower),
+        )
+        rows.append(f"{''.join(cells)}\x1b[0m\n")
+    return "".join(rows)
+
+
+def truecolor_half_block_rows(rgb: bytes, width: int, height: int) -> str:
+    """
+    Draw a width x (height * 2) RGB buffer as height rows of upper half
+    blocks with 24 bit colors, like half_block_rows.
+    """
+    rows: list[str] = []
+    row_bytes: int = width * 3
+    for y in range(height):
+        upper: bytes = rgb[2 * y * row_bytes : (2 * y + 1) * row_bytes]
+        lower: bytes = rgb[(2 * y + 1) * row_bytes : (2 * y + 2) * row_bytes]
+        cells = map(
+            TRUECOLOR_CELL.format,
+            upper[0::3],
+            upper[1::3],
+            upper[2::3],
+            lower[0::3],
+            lower[1::3],
+            lower[2::3],
+        )
+        rows.append(f"{''.join(cells)}\x1b[0m\n")
+    return "".join(rows)
 
 
 def truncate(string: str, start_len: int = 0):
@@ -83,8 +205,30 @@ def truncate(string: str, start_len: int = 0):
     return out.strip()
 
 
+@dataclass(slots=True)
+class EventBlock:
+    """
+    Text of an event as echo_event writes it, but for its image and the
+    humanized part of its date, which change from run to run.
+    """
+
+    head: str = ""
+    name: str = ""
+    name_len: int = 0
+    # Date without the humanized part and its timestamp, empty if unknown
+    date: str = ""
+    timestamp: float = 0.0
+    before_image: str = ""
+    tail: str = ""
+
+
 class ElCairoEventsPrinter:
-    """Echo ElCairoEvents."""
+    """
+    Echo ElCairoEvents.
+    The output is built in memory and written in a single block at the end of
+    echo_list, or after every event when stream is set or images are
+    rendered, so each one shows as soon as its image is ready.
+    """
 
     def __init__(
         self,
@@ -97,6 +241,9 @@ class ElCairoEventsPrinter:
         url: bool,
         separator: bool,
         image_renderer: str | None = None,
+        render_cache: RenderCache | None = None,
+        stream: bool = False,
+        block_cache: BlockCache | None = None,
     ):
         self.name = name
         self.date = date
@@ -107,69 +254,85 @@ class ElCairoEventsPrinter:
         self.url = url
         self.separator = separator
         self.image_renderer = image_renderer
+        self.render_cache = render_cache
+        self.stream = stream
+        self.block_cache = block_cache
+
+        color: bool | None = resolve_color_default()
+        if color is None:
+            color = click.get_text_stream("stdout").isatty()
+        self.strip_styles: bool = not color
+        self._buffer: list[str] = []
+        self._buffered: int = 0
+        # Everything a block depends on besides its event
+        self._block_key: str = "".join(
+            str(int(flag))
+            for flag in (
+                name,
+                date,
+                image,
+                image_url,
+                synopsis,
+                extra_info,
+                url,
+                separator,
+                self.strip_styles,
+            )
+        )
 
-    def echo_list(self, events: list[ElCairoEvent] | None = None) -> None:
+    def write(self, text: str = "", nl: bool = True, raw: bool = False) -> None:
+        """
+        Buffer text until the next flush.
+        Styles are removed if the output doesn't support them, raw text, like
+        rendered images, is kept as is.
+        """
+        if self.strip_styles and not raw:
+            text = click.unstyle(text)
+        if nl:
+            text = f"{text}\n"
+        self._buffer.append(text)
+        self._buffered += len(text)
+
+    def capture(self, echo: Callable[[], None]) -> str:
+        """Text that echo writes, instead of buffering it."""
+        buffer, buffered = self._buffer, self._buffered
+        self._buffer = []
+        try:
+            echo()
+            return "".join(self._buffer)
+        finally:
+            self._buffer, self._buffered = buffer, buffered
+
+    def style(self, text: str, **styles) -> str:
+        """Text styled with click.style, if the output supports styles."""
+        return text if self.strip_styles else click.style(text, **styles)
+
+    def flush(self) -> None:
+        """Write the buffered text."""
+        if not self._buffer:
+            return
+        click.echo("".join(self._buffer), nl=False, color=True)
+        self._buffer.clear()
+        self._buffered = 0
+
+    def echo_list(self, events: Iterable[ElCairoEvent] | None = None) -> None:
         """Print a list of events."""
 
-        if not events:
-            return
+        printed: bool = False
+        for event, image in self.with_images(events or ()):
+            printed = True
+            self.echo_event(event, image)
+            if self.stream or self.image or self._buffered >= FLUSH_SIZE:
+                self.flush()
 
-        for event in events:
-            if self.separator:
-                click.echo(f"{WIDTH * '*'}")
-
-            if (
-                self.name
-                or self.date
-                or self.image
-                or self.image_url
-                or self.synopsis
-                or self.extra_info
-                or self.url
-                or self.separator
-            ):
-                click.echo()
-
-            if self.name or self.date:
-                self.echo_title(event, self.name, self.date)
-
-            if self.image:
-                if self.name or self.date:
-                    click.echo()
-                self.echo_image(event)
-
-            if self.image_url:
-                if self.name or self.date or self.image:
-                    click.echo()
-                self.echo_image_url(event)
-
-            if self.synopsis:
-                if self.name or self.date or self.image or self.image_url:
-                    click.echo()
-                self.echo_synopsis(event)
-
-            if self.extra_info:
-                self.echo_extra_info(event)
-
-            if self.url:
-                if not self.extra_info and (
-                    self.name or self.date or self.image or self.image_url
-                ):
-                    click.echo()
-                self.echo_url(event)
-
-            if (
-                self.image
-                or self.image_url
-                or self.synopsis
-                or self.extra_info
-                or self.url
-                or self.separator
-            ):
-                click.echo()
+        if self.block_cache is not None:
+            self.block_cache.save()
+
+        if not printed:
+            return
 
         if self.separator:
-            click.echo(f"{WIDTH * '*'}")
+            self.write(f"{WIDTH * '*'}")
 
         if not (
             self.image
@@ -179,60 +342,185 @@ class ElCairoEventsPrinter:
             or self.url
             or self.separator
         ):
-            click.echo()
-
-    @staticmethod
-    def echo_title(event: ElCairoEvent, name: bool = True, date: bool = True) -> None:
-        """Echo the event title with the date of the show."""
-
-        if not name and not date:
+            self.write()
+
+        self.flush()
+
+    def with_images(
+        self, events: Iterable[ElCairoEvent]
+    ) -> Iterator[tuple[ElCairoEvent, tuple[str, bool] | None]]:
+        """
+        Pair each event with the output of its image, in order.
+        The images are rendered by a pool of RENDER_WORKERS threads, up to
+        RENDER_AHEAD events ahead of the one being printed, so the renderer
+        processes run at once and an event is printed as soon as its image
+        is ready.
+        """
+        if not self.image:
+            for event in events:
+                yield event, None
             return
 
-        def get_nice_date(event_date: str) -> str:
-            """Format the date information a return a nice show's date"""
-
-            if not event_date:
-                return DEFAULT
+        executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=RENDER_WORKERS)
+        pending: deque[tuple[ElCairoEvent, Future]] = deque()
+        try:
+            for event in events:
+                pending.append((event, executor.submit(self.image_output, event)))
+                if len(pending) > RENDER_AHEAD:
+                    next_event, future = pending.popleft()
+                    yield next_event, future.result()
+            while pending:
+                next_event, future = pending.popleft()
+                yield next_event, future.result()
+        finally:
+            executor.shutdown(cancel_futures=True)
+
+    def echo_event(
+        self, event: ElCairoEvent, image: tuple[str, bool] | None = None
+    ) -> None:
+        """Print an event, image is its image_output if already rendered."""
+
+        block: EventBlock = self.event_block(event)
+        self.write(block.head, nl=False, raw=True)
+
+        if self.name or self.date:
+            self.echo_title(block)
+
+        if self.image:
+            self.write(block.before_image, nl=False, raw=True)
+            self.echo_image(event, image)
+
+        self.write(block.tail, nl=False, raw=True)
+
+    def event_block(self, event: ElCairoEvent) -> EventBlock:
+        """Block of an event, formatted unless the block cache has it."""
+
+        cache_key: str | None = None
+        if self.block_cache is not None:
+            # Every field of the event, archive updates the scraped ones of
+            # past events without changing their content_hash
+            cache_key = "\0".join((repr(event), self._block_key, str(WIDTH)))
+            cached: list | None = self.block_cache.load(cache_key)
+            if cached is not None:
+                return EventBlock(*cached)
+
+        block: EventBlock = self.format_event(event)
+        if cache_key is not None and self.block_cache is not None:
+            self.block_cache.store(cache_key, list(astuple(block)))
+        return block
+
+    def format_event(self, event: ElCairoEvent) -> EventBlock:
+        """Format the parts of an event that don't depend on the time."""
+
+        block: EventBlock = EventBlock()
+        block.head = self.capture(self.echo_head)
+
+        if self.name:
+            name_str: str = event.name or DEFAULT
+            block.name = self.style(name_str, fg="green", bold=True, underline=True)
+            block.name_len = len(name_str)
 
-            arrow_date: Arrow = arrow.get(event_date)
-            format_date: str = arrow_date.format(
+        if self.date and event.date:
+            arrow_date: Arrow = arrow.get(event.date)
+            block.date = arrow_date.format(
                 "dddd DD-MM-YYYY HH:mm:ss", locale="es"
             ).capitalize()
-            human_date: str = arrow_date.humanize(locale="es")
+            block.timestamp = arrow_date.timestamp()
 
-            return f"{format_date} ({human_date})"
+        if self.name or self.date:
+            block.before_image = "\n"
 
-        name_styled: str = ""
-        date_styled: str = ""
-        title_len: int = 0
+        block.tail = self.capture(lambda: self.echo_tail(event))
+        return block
 
-        if name:
-            name_str: str = event.name or DEFAULT
-            title_len += len(name_str)
-            name_styled: str = click.style(
-                name_str, fg="green", bold=True, underline=True
-            )
+    def echo_head(self) -> None:
+        """Echo what goes before the title of an event."""
 
-        if date:
-            date_str: str = get_nice_date(event.date)
+        if self.separator:
+            self.write(f"{WIDTH * '*'}")
+
+        if (
+            self.name
+            or self.date
+            or self.image
+            or self.image_url
+            or self.synopsis
+            or self.extra_info
+            or self.url
+            or self.separator
+        ):
+            self.write()
+
+    def echo_tail(self, event: ElCairoEvent) -> None:
+        """Echo what goes after the image of an event."""
+
+        if self.image_url:
+            if self.name or self.date or self.image:
+                self.write()
+            self.echo_image_url(event)
+
+        if self.synopsis:
+            if self.name or self.date or self.image or self.image_url:
+                self.write()
+            self.echo_synopsis(event)
+
+        if self.extra_info:
+            self.echo_extra_info(event)
+
+        if self.url:
+            if not self.extra_info and (
+                self.name or self.date or self.image or self.image_url
+            ):
+                self.write()
+            self.echo_url(event)
+
+        if (
+            self.image
+            or self.image_url
+            or self.synopsis
+            or self.extra_info
+            or self.url
+            or self.separator
+        ):
+            self.write()
+
+    def echo_title(self, block: EventBlock) -> None:
+        """
+        Echo the event title with the date of the show.
+        Only the humanized date is computed here, the rest comes formatted.
+        """
+
+        name_styled: str = ""
+        date_styled: str = ""
+        title_len: int = 4
+
+        if self.name:
+            name_styled = block.name
+            title_len += block.name_len
+
+        if self.date:
+            date_str: str = DEFAULT
+            if block.date:
+                human_date: str = Arrow.utcfromtimestamp(block.timestamp).humanize(
+                    locale="es"
+                )
+                date_str = f"{block.date} ({human_date})"
             title_len += len(date_str)
-            date_styled: str = click.style(
-                date_str, fg="blue", bold=True, underline=True
+            date_styled = (
+                date_str
+                if self.strip_styles
+                else f"{DATE_STYLE_START}{date_str}{DATE_STYLE_END}"
             )
 
-        title_len += 4
-
         space_for_center = f"{' ' * (int((WIDTH - title_len) / 2))}"
 
-        click.echo(f"{space_for_center}{name_styled}    {date_styled}")
+        self.write(f"{space_for_center}{name_styled}    {date_styled}", raw=True)
 
-    @staticmethod
-    def echo_synopsis(event: ElCairoEvent) -> None:
+    def echo_synopsis(self, event: ElCairoEvent) -> None:
         synopsis = event.synopsis or DEFAULT
-        click.secho(truncate(synopsis), italic=True)
+        self.write(click.style(truncate(synopsis), italic=True))
 
-    @staticmethod
-    def echo_extra_info(event: ElCairoEvent) -> None:
+    def echo_extra_info(self, event: ElCairoEvent) -> None:
         """Echo extra info."""
 
         def echo_extra_info_data(
@@ -244,9 +532,9 @@ class ElCairoEventsPrinter:
             if not data:
                 data = DEFAULT
 
-            click.echo(f"{click.style(name, fg='yellow')}{truncate(data, len(name))}")
+            self.write(f"{click.style(name, fg='yellow')}{truncate(data, len(name))}")
 
-        click.echo(f"{WIDTH * '-'}")
+        self.write(f"{WIDTH * '-'}")
 
         echo_extra_info_data("Dirección: ", event.extra_info.direction)
         echo_extra_info_data("Elenco: ", event.extra_info.cast)
@@ -257,51 +545,90 @@ class ElCairoEventsPrinter:
         echo_extra_info_data("Calificación: ", event.extra_info.age)
         echo_extra_info_data("Valor: ", event.cost)
 
-        click.echo(f"{WIDTH * '-'}")
+        self.write(f"{WIDTH * '-'}")
+
+    def echo_image(
+        self, event: ElCairoEvent, image: tuple[str, bool] | None = None
+    ) -> None:
+        """Echo an image, rendering it unless image_output was already called."""
+
+        text, raw = image or self.image_output(event)
+        self.write(text, nl=False, raw=raw)
 
-    def echo_image(self, event: ElCairoEvent) -> None:
-        """Echo an image using the best available renderer."""
+    def image_output(self, event: ElCairoEvent) -> tuple[str, bool]:
+        """
+        Text that echo_image writes for an event and whether it is raw.
+        It can be called from several threads at once.
+        """
 
         if not event.image_path:
-            return click.echo(f"{DEFAULT}")
+            return f"{DEFAULT}\n", False
 
         image_path: str = event.image_path
         renderer = self.image_renderer or detect_renderer()
 
         if renderer == "wezterm" and os.getenv("TERM_PROGRAM") != "WezTerm":
-            click.echo("Image renderer 'wezterm' requires a WezTerm terminal.")
-            return
-
-        if renderer == "builtin":
-            builtin_ascii_render(image_path)
-            return
+            return "Image renderer 'wezterm' requires a WezTerm terminal.\n", False
 
         width = WIDTH * 2 if renderer == "catimg" else WIDTH
 
-        cmd_list = RENDERERS[renderer].format(width=width).split()
+        cache_key: str | None = None
+        if self.render_cache is not None:
+            cache_key = self.render_cache.key(image_path, renderer, width)
+            if cache_key is not None:
+                cached: bytes | None = self.render_cache.load(cache_key)
+                if cached is not None:
+                    return cached.decode(errors="replace"), True
+
+        output, rendered = self.render_image(image_path, renderer, width)
+
+        if rendered and cache_key is not None and self.render_cache is not None:
+            self.render_cache.store(cache_key, output)
+        return output.decode(errors="replace"), True
+
+    @staticmethod
+    def render_image(image_path: str, renderer: str, width: int) -> tuple[bytes, bool]:
+        """
+        Terminal output of an image rendered with renderer and whether the
+        render succeeded. When it fails the output explains why.
+        """
+
+        if renderer in ("builtin", "builtin-color"):
+            ascii_art: str | None = builtin_ascii_render(
+                image_path,
+                color=renderer == "builtin-color",
+                truecolor=terminal_options()["colors"] == "full",
+            )
+            if ascii_art is None:
+                return f"Could not open image: {image_path}\n".encode(), False
+            return ascii_art.encode(), True
+
+        import subprocess
+
+        cmd_list = RENDERERS[renderer].format(width=width, **terminal_options()).split()
         cmd_list.append(image_path)
         try:
-            subprocess.run(cmd_list)
+            completed = subprocess.run(cmd_list, stdout=subprocess.PIPE)
         except FileNotFoundError:
-            click.echo(f"Image renderer '{renderer}' not found.")
+            return f"Image renderer '{renderer}' not found.\n".encode(), False
 
-    @staticmethod
-    def echo_image_url(event: ElCairoEvent) -> None:
+        return completed.stdout, completed.returncode == 0
+
+    def echo_image_url(self, event: ElCairoEvent) -> None:
         """Echo image url."""
 
         if not event.image_url:
-            click.echo(f"{DEFAULT}")
+            self.write(f"{DEFAULT}")
             return
 
         image_url: str = f"({click.style(event.image_url, italic=True)})"
         space_for_center: str = f"{' ' * (int((WIDTH - len(image_url)) / 2))}"
-        click.echo(f"{space_for_center}{image_url}")
+        self.write(f"{space_for_center}{image_url}")
 
-    @staticmethod
-    def echo_url(event: ElCairoEvent) -> None:
+    def echo_url(self, event: ElCairoEvent) -> None:
         """Echo url."""
 
         url: str = event.url or DEFAULT
-        click.echo(
+        self.write(
             f"{click.style('URL:', fg='yellow')} {click.style(url, italic=True)}"
         )
@@ -0,0 +1,159 @@
+"""Write events in machine readable formats."""
+
+import abc
+import csv
+import datetime
+import json
+from collections.abc import Iterable
+from typing import TextIO
+
+import click
+
+from elcairo.api.events import ElCairoEvent, ElCairoExtraInfo
+from elcairo.api.ics_text import escape_text, fold_line
+
+EVENT_FIELDS: tuple[str, ...] = (
+    "uid",
+    "name",
+    "date",
+    "synopsis",
+    "cost",
+    "image_url",
+    "image_path",
+    "url",
+    "content_hash",
+)
+EXTRA_INFO_FIELDS: tuple[str, ...] = tuple(ElCairoExtraInfo.__slots__)
+
+
+def event_dict(event: ElCairoEvent) -> dict:
+    """Fields of an event, the extra info nested."""
+    extra_info: ElCairoExtraInfo = event.extra_info
+    return {
+        **{name: getattr(event, name) for name in EVENT_FIELDS},
+        "extra_info": {name: getattr(extra_info, name) for name in EXTRA_INFO_FIELDS},
+    }
+
+
+class EventsWriter(abc.ABC):
+    """
+    Write the events as they are read, without styling.
+    Like ElCairoEventsPrinter, the events are written by echo_list.
+    """
+
+    def __init__(self, stream: TextIO | None = None) -> None:
+        self.stream: TextIO = stream or click.get_text_stream("stdout")
+
+    def echo_list(self, events: Iterable[ElCairoEvent] | None = None) -> None:
+        """Write a list of events."""
+        self.begin()
+        for event in events or ():
+            self.write_event(event)
+        self.end()
+        self.stream.flush()
+
+    def begin(self) -> None:  # noqa: B027
+        """Write what goes before the events, nothing by default."""
+
+    @abc.abstractmethod
+    def write_event(self, event: ElCairoEvent) -> None:
+        """Write an event."""
+
+    def end(self) -> None:  # noqa: B027
+        """Write what goes after the events, nothing by default."""
+
+
+class JsonEventsWriter(EventsWriter):
+    """A JSON array of events, one per line."""
+
+    def begin(self) -> None:
+        self.stream.write("[")
+        self._separator: str = "\n"
+
+    def write_event(self, event: ElCairoEvent) -> None:
+        self.stream.write(self._separator)
+        self.stream.write(json.dumps(event_dict(event), ensure_ascii=False))
+        self._separator = ",\n"
+
+    def end(self) -> None:
+        self.stream.write("\n]\n")
+
+
+class NdjsonEventsWriter(EventsWriter):
+    """A JSON object per line, each one flushed as soon as it is written."""
+
+    def write_event(self, event: ElCairoEvent) -> None:
+        self.stream.write(f"{json.dumps(event_dict(event), ensure_ascii=False)}\n")
+        self.stream.flush()
+
+
+class CsvEventsWriter(EventsWriter):
+    """CSV with a header, the extra info fields are columns."""
+
+    def begin(self) -> None:
+        self._writer = csv.writer(self.stream)
+        self._writer.writerow((*EVENT_FIELDS, *EXTRA_INFO_FIELDS))
+
+    def write_event(self, event: ElCairoEvent) -> None:
+        extra_info: ElCairoExtraInfo = event.extra_info
+        self._writer.writerow(
+            (
+                *(getattr(event, name) for name in EVENT_FIELDS),
+                *(getattr(extra_info, name) for name in EXTRA_INFO_FIELDS),
+            )
+        )
+
+
+class IcsEventsWriter(EventsWriter):
+    """An iCalendar calendar with a VEVENT per event."""
+
+    def begin(self) -> None:
+        self._stamp: str = ics_datetime(datetime.datetime.now(datetime.timezone.utc))
+        self.write_lines(
+            (
+                "BEGIN:VCALENDAR",
+                "VERSION:2.0",
+                "PRODID:-//elcairo//shows//ES",
+                "CALSCALE:GREGORIAN",
+            )
+        )
+
+    def write_event(self, event: ElCairoEvent) -> None:
+        lines: list[str] = [
+            "BEGIN:VEVENT",
+            f"UID:{escape_text(event.uid or event.url)}",
+            f"DTSTAMP:{self._stamp}",
+        ]
+        if event.date:
+            start: datetime.datetime = datetime.datetime.fromisoformat(event.date)
+            lines.append(f"DTSTART:{ics_datetime(start)}")
+        if event.name:
+            lines.append(f"SUMMARY:{escape_text(event.name)}")
+        if event.synopsis:
+            lines.append(f"DESCRIPTION:{escape_text(event.synopsis)}")
+        if event.url:
+            lines.append(f"URL:{event.url}")
+        if event.image_url:
+            lines.append(f"ATTACH:{event.image_url}")
+        lines.append("END:VEVENT")
+        self.write_lines(lines)
+
+    def end(self) -> None:
+        self.write_lines(("END:VCALENDAR",))
+
+    def write_lines(self, lines: Iterable[str]) -> None:
+        """Write content lines, folded and ended in CRLF."""
+        self.stream.write("".join(f"{fold_line(line)}\r\n" for line in lines))
+
+
+def ics_datetime(date: datetime.datetime) -> str:
+    """UTC datetime value of a date with time zone."""
+    return date.astimezone(datetime.timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+WRITERS: dict[str, type[EventsWriter]] = {
+    "json": JsonEventsWriter,
+    "ndjson": NdjsonEventsWriter,
+    "csv": CsvEventsWriter,
+    "ics": IcsEventsWriter,
+}
@@ -0,0 +1,104 @@
+"""Cache of images already rendered for the terminal."""
+
+import hashlib
+import os
+import shutil
+import threading
+from pathlib import Path
+
+# Renderers adapt their output to the terminal they detect
+TERMINAL_VARIABLES = ("TERM", "COLORTERM", "TERM_PROGRAM")
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+
+
+class RenderCache:
+    """
+    Rendered terminal output stored in a directory, one file per
+    (image path, image mtime, renderer, width) combination.
+    Editing or replacing an image changes its mtime, which invalidates its
+    renders. The least recently used renders are evicted once they add up to
+    more than max_bytes.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._size: int | None = None
+
+    def key(self, image_path: str, renderer: str, width: int) -> str | None:
+        """Cache key of a render, None if the image can't be found."""
+        try:
+            mtime: int = Path(image_path).stat().st_mtime_ns
+        except OSError:
+            return None
+
+        terminal: str = "\0".join(os.getenv(name, "") for name in TERMINAL_VARIABLES)
+        raw_key: str = f"{image_path}\0{mtime}\0{renderer}\0{width}\0{terminal}"
+        return hashlib.sha256(raw_key.encode()).hexdigest()
+
+    def load(self, key: str) -> bytes | None:
+        """Rendered output stored under key, marked as recently used."""
+        file_path: Path = self.directory / key
+        try:
+            output: bytes = file_path.read_bytes()
+            os.utime(file_path)
+        except OSError:
+            return None
+        return output
+
+    def store(self, key: str, output: bytes) -> None:
+        """Save rendered output under key, evicting old renders if needed."""
+        file_path: Path = self.directory / key
+        tmp_path: Path = file_path.with_name(f"{key}.tmp{threading.get_ident()}")
+        with self._lock:
+            size: int = self._current_size()
+            try:
+                self.directory.mkdir(parents=True, exist_ok=True)
+                if file_path.exists():
+                    size -= file_path.stat().st_size
+                tmp_path.write_bytes(output)
+                tmp_path.replace(file_path)
+            except OSError:
+                tmp_path.unlink(missing_ok=True)
+                return
+
+            self._size = size + len(output)
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def clear(self) -> None:
+        """Remove every render."""
+        with self._lock:
+            shutil.rmtree(self.directory, ignore_errors=True)
+            self._size = 0
+
+    def _renders(self) -> list[Path]:
+        if not self.directory.exists():
+            return []
+        # Skip the temporary files of renders being stored
+        return [path for path in self.directory.iterdir() if "." not in path.name]
+
+    def _current_size(self) -> int:
+        if self._size is None:
+            self._size = sum(render.stat().st_size for render in self._renders())
+        return self._size
+
+    def _evict(self) -> None:
+        """Remove least recently used renders until the size limit is met."""
+        renders: list[tuple[float, int, Path]] = []
+        for render in self._renders():
+            try:
+                stat: os.stat_result = render.stat()
+            except OSError:
+                continue
+            renders.append((stat.st_mtime, stat.st_size, render))
+        renders.sort()
+
+        size: int = sum(render_size for _, render_size, _ in renders)
+        for _, render_size, render in renders:
+            if size <= self.max_bytes:
+                break
+            render.unlink(missing_ok=True)
+            size -= render_size
+        self._size = size
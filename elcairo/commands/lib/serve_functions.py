@@ -0,0 +1,301 @@
+"""Functions used in the serve command."""
+
+import bisect
+import dataclasses
+import json
+import re
+import sys
+import threading
+import unicodedata
+import urllib.parse
+from collections.abc import Callable
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import arrow
+
+import elcairo.commands.lib.shows_functions as shows_functions
+from elcairo.api.events import ElCairoEvent, ElCairoExtraInfo
+from elcairo.models import EventModel, db
+
+EVENT_COLUMNS: tuple[str, ...] = (
+    "name",
+    "date",
+    "synopsis",
+    "cost",
+    "image_url",
+    "image_path",
+    "url",
+    "content_hash",
+    "uid",
+)
+DATE_FORMAT = "DD-MM-YYYY"
+DEFAULT_SEARCH_LIMIT = 20
+
+
+def init_read_only(database_file: Path) -> None:
+    """Point db to database_file, opened read only."""
+    db.init(f"{database_file.resolve().as_uri()}?mode=ro", uri=True)
+
+
+def normalize(text: str) -> str:
+    """Lowercase text without diacritics, like the search index tokenizer."""
+    decomposed: str = unicodedata.normalize("NFKD", text.lower())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def search_text(event: ElCairoEvent) -> str:
+    """Words of the searchable fields of an event, each preceded by a space."""
+    fields: tuple[str, ...] = (
+        event.name,
+        event.synopsis,
+        event.extra_info.direction,
+        event.extra_info.cast,
+        event.extra_info.genre,
+    )
+    words: list[str] = re.findall(r"\w+", normalize(" ".join(fields)))
+    return "".join(f" {word}" for word in words)
+
+
+class EventIndex:
+    """
+    Every event of the database in memory, sorted by date.
+    Date ranges are found with a binary search over the dates, and each event
+    is kept already encoded as JSON. The index reloads itself when the
+    database file, or its write ahead log, changes. While the file is
+    missing the last events loaded are kept.
+    """
+
+    def __init__(self, database_file: Path) -> None:
+        self.database_file = database_file
+        self.dates: list[int] = []
+        self.encoded: list[bytes] = []
+        self.search_texts: list[str] = []
+        self._signature: tuple = ()
+        self._lock = threading.Lock()
+
+    def signature(self) -> tuple:
+        """Identity and modification time of the database files."""
+        signature: list[tuple[int, int, int] | None] = []
+        for suffix in ("", "-wal"):
+            try:
+                stat = Path(f"{self.database_file}{suffix}").stat()
+            except OSError:
+                signature.append(None)
+                continue
+            signature.append((stat.st_ino, stat.st_mtime_ns, stat.st_size))
+        return tuple(signature)
+
+    def refresh(self) -> bool:
+        """Reload the events if the database changed, returns whether it did."""
+        signature: tuple = self.signature()
+        if signature == self._signature or signature[0] is None:
+            return False
+
+        with self._lock:
+            if signature == self._signature:
+                return False
+            self.load()
+            self._signature = signature
+        return True
+
+    def load(self) -> None:
+        """Read every event of the database."""
+        selected: list[str] = [*EVENT_COLUMNS, *shows_functions.EXTRA_INFO_COLUMNS]
+        extra_start: int = len(EVENT_COLUMNS) + 1
+
+        init_read_only(self.database_file)
+        with db.connection_context():
+            rows = (
+                EventModel.select(
+                    EventModel.compare_date,
+                    *(getattr(EventModel, name) for name in selected),
+                )
+                .order_by(EventModel.compare_date.asc(), EventModel.event_id.asc())
+                .tuples()
+            )
+
+            dates: list[int] = []
+            encoded: list[bytes] = []
+            search_texts: list[str] = []
+            for row in rows:
+                event: ElCairoEvent = ElCairoEvent(
+                    **dict(zip(EVENT_COLUMNS, row[1:extra_start], strict=True)),
+                    extra_info=ElCairoExtraInfo(*row[extra_start:]),
+                )
+                dates.append(row[0])
+                encoded.append(
+                    json.dumps(dataclasses.asdict(event), ensure_ascii=False).encode()
+                )
+                search_texts.append(search_text(event))
+
+        # Readers of the previous lists keep a consistent view
+        self.dates, self.encoded, self.search_texts = dates, encoded, search_texts
+
+    def between(self, date_int_min: int, date_int_max: int) -> list[bytes]:
+        """Events whose date is in [date_int_min, date_int_max], by date."""
+        dates, encoded = self.dates, self.encoded
+        start: int = bisect.bisect_left(dates, date_int_min)
+        end: int = bisect.bisect_right(dates, date_int_max)
+        return encoded[start:end]
+
+    def search(self, text: str, limit: int) -> list[bytes]:
+        """
+        Events that contain every word of text, the last characters of a word
+        may be missing. Upcoming events come first, by date.
+        """
+        words: list[str] = [f" {word}" for word in re.findall(r"\w+", normalize(text))]
+        if not words:
+            return []
+
+        encoded, search_texts = self.encoded, self.search_texts
+        matches: list[int] = [
+            index
+            for index, event_text in enumerate(search_texts)
+            if all(word in event_text for word in words)
+        ]
+        now: int = shows_functions.day_start(arrow.now())
+        first_upcoming: int = bisect.bisect_left(self.dates, now)
+        matches.sort(key=lambda index: (index < first_upcoming, index))
+        return [encoded[index] for index in matches[:limit]]
+
+
+def parse_date(value: str) -> arrow.Arrow:
+    """Date of a query parameter, raises ValueError if it is invalid."""
+    try:
+        return arrow.get(value, DATE_FORMAT)
+    except ValueError as exc:
+        raise ValueError(
+            f"Invalid date {value!r}, the format is {DATE_FORMAT}"
+        ) from exc
+
+
+def date_param(params: dict[str, str], name: str) -> arrow.Arrow:
+    """Date of a required query parameter, raises ValueError if it is missing."""
+    if name not in params:
+        raise ValueError(f"Missing parameter {name}")
+    return parse_date(params[name])
+
+
+def day_range(date: arrow.Arrow) -> tuple[int, int]:
+    """Range of dates of a whole day."""
+    return shows_functions.day_start(date), shows_functions.day_end(date)
+
+
+def range_dates(params: dict[str, str]) -> tuple[int, int]:
+    """Range of dates of /range, each end is optional."""
+    start: int = (
+        shows_functions.day_start(date_param(params, "from")) if "from" in params else 0
+    )
+    end: int = (
+        shows_functions.day_end(date_param(params, "to"))
+        if "to" in params
+        else sys.maxsize
+    )
+    return start, end
+
+
+# Range of dates of every date endpoint, like the shows subcommand of the same
+# name. They raise ValueError for invalid parameters.
+DATE_ENDPOINTS: dict[str, Callable[[dict[str, str]], tuple[int, int]]] = {
+    "/today": lambda params: day_range(arrow.now()),
+    "/tomorrow": lambda params: day_range(arrow.now().shift(days=1)),
+    "/week": lambda params: (
+        shows_functions.day_start(arrow.now()),
+        shows_functions.day_end(shows_functions.next_sunday()),
+    ),
+    "/weekend": lambda params: (
+        shows_functions.day_start(shows_functions.next_saturday()),
+        shows_functions.day_end(shows_functions.next_sunday()),
+    ),
+    "/day": lambda params: day_range(date_param(params, "date")),
+    "/until": lambda params: (
+        shows_functions.day_start(arrow.now()),
+        shows_functions.day_end(date_param(params, "date")),
+    ),
+    "/upcoming": lambda params: (shows_functions.day_start(arrow.now()), sys.maxsize),
+    "/range": range_dates,
+}
+
+
+class EventsServer(ThreadingHTTPServer):
+    """HTTP server that answers from an EventIndex."""
+
+    daemon_threads = True
+
+    def __init__(
+        self, address: tuple[str, int], index: EventIndex, access_log: bool = False
+    ) -> None:
+        super().__init__(address, EventsRequestHandler)
+        self.index = index
+        self.access_log = access_log
+
+
+class EventsRequestHandler(BaseHTTPRequestHandler):
+    """
+    GET /today, /tomorrow, /week, /weekend, /day?date=, /until?date=,
+    /upcoming, /range?from=&to= and /search?q=&limit=, the dates in
+    DD-MM-YYYY. The date endpoints take order=asc|desc, like the shows
+    subcommands, and every one answers {"count": n, "events": [...]}.
+    """
+
+    server: EventsServer
+    # Keep the connections of the clients open between requests
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        url = urllib.parse.urlsplit(self.path)
+        params: dict[str, str] = dict(urllib.parse.parse_qsl(url.query))
+        index: EventIndex = self.server.index
+
+        date_endpoint: Callable[[dict[str, str]], tuple[int, int]] | None = None
+        if url.path != "/search":
+            try:
+                date_endpoint = DATE_ENDPOINTS[url.path]
+            except KeyError:
+                self.send_json(404, b'{"error": "Unknown endpoint"}')
+                return
+
+        try:
+            index.refresh()
+            if date_endpoint is None:
+                limit: int = int(params.get("limit", DEFAULT_SEARCH_LIMIT))
+                if limit < 1:
+                    raise ValueError("limit must be positive")
+                events: list[bytes] = index.search(params.get("q", ""), limit)
+            else:
+                events = index.between(*date_endpoint(params))
+                if params.get("order", "desc").lower() == "desc":
+                    events.reverse()
+        except ValueError as exc:
+            self.send_json(400, json.dumps({"error": str(exc)}).encode())
+            return
+        except Exception as exc:
+            self.log_error("Failed to answer %s: %r", self.path, exc)
+            self.send_json(500, b'{"error": "Internal server error"}')
+            return
+
+        body: bytes = b"".join(
+            (
+                f'{{"count": {len(events)}, "events": ['.encode(),
+                b",".join(events),
+                b"]}",
+            )
+        )
+        self.send_json(200, body)
+
+    def send_json(self, status: int, body: bytes) -> None:
+        """Answer with a JSON body."""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        if self.server.access_log:
+            super().log_message(format, *args)
+
+    def log_error(self, format: str, *args) -> None:
+        # Errors are printed without the access log too
+        super().log_message(format, *args)
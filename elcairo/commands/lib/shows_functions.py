@@ -1,77 +1,176 @@
 """Functions used in the shows command."""
 
+from collections.abc import Iterator
+from dataclasses import dataclass
 from pathlib import Path
 
 import arrow
 import click
+from peewee import OperationalError, Select
 
-from elcairo.api.elcairo import ElCairoEvent, ElCairoExtraInfo
+import elcairo.settings as settings
+from elcairo.api.events import ElCairoEvent, ElCairoExtraInfo
+from elcairo.commands.lib.block_cache import BlockCache
 from elcairo.commands.lib.events_printer import ElCairoEventsPrinter
-from elcairo.models import EventModel, db
-
-
-def create_elcairo_event(row: dict) -> ElCairoEvent:
-    extra_info: ElCairoExtraInfo = ElCairoExtraInfo(
-        direction=row["direction"],
-        cast=row["cast"],
-        genre=row["genre"],
-        duration=row["duration"],
-        origin=row["origin"],
-        year=row["year"],
-        age=row["age"],
-    )
-    return ElCairoEvent(
-        name=row["name"],
-        date=row["date"],
-        synopsis=row["synopsis"],
-        cost=row["cost"],
-        image_url=row["image_url"],
-        image_path=row["image_path"],
-        url=row["url"],
-        extra_info=extra_info,
+from elcairo.commands.lib.events_writers import EVENT_FIELDS, WRITERS
+from elcairo.commands.lib.render_cache import RenderCache
+from elcairo.migrations import OUTDATED_MESSAGE, is_outdated
+from elcairo.models import EventModel, EventSearchModel, db
+
+EXTRA_INFO_COLUMNS: tuple[str, ...] = (
+    "direction",
+    "cast",
+    "genre",
+    "duration",
+    "origin",
+    "year",
+    "age",
+)
+
+
+@dataclass(frozen=True)
+class EventColumns:
+    """
+    Columns loaded for each event.
+    extra_info loads the ElCairoExtraInfo columns, in their field order.
+    """
+
+    event: tuple[str, ...] = (
+        "name",
+        "date",
+        "synopsis",
+        "cost",
+        "image_url",
+        "image_path",
+        "url",
     )
+    extra_info: bool = True
+
+
+def event_columns(obj: dict) -> EventColumns:
+    """
+    Only the columns that the printer flags passed will print, and the ones
+    that identify the formatted events in the block cache.
+    """
+    columns: list[str] = ["uid", "content_hash"]
+    if obj["name"]:
+        columns.append("name")
+    if obj["date"]:
+        columns.append("date")
+    if obj["image"]:
+        columns.append("image_path")
+    if obj["image_url"]:
+        columns.append("image_url")
+    if obj["synopsis"]:
+        columns.append("synopsis")
+    if obj["extra_info"]:
+        columns.append("cost")
+    if obj["url"]:
+        columns.append("url")
+    return EventColumns(event=tuple(columns), extra_info=obj["extra_info"])
+
+
+def select_events(columns: EventColumns) -> Select:
+    """Select only the given columns of the events."""
+    selected: list[str] = list(columns.event)
+    if columns.extra_info:
+        selected.extend(EXTRA_INFO_COLUMNS)
+    return EventModel.select(*(getattr(EventModel, name) for name in selected))
+
+
+def load_events(rows: Select, columns: EventColumns) -> Iterator[ElCairoEvent]:
+    """
+    Read the rows of select_events as tuples straight into the events, the
+    fields that were not selected keep their defaults.
+    Rows are read from the cursor as the events are iterated.
+    """
+    extra_start: int = len(columns.event)
+    cursor = rows.tuples().iterator()
+    if not columns.extra_info:
+        for row in cursor:
+            yield ElCairoEvent(**dict(zip(columns.event, row, strict=False)))
+        return
+
+    for row in cursor:
+        yield ElCairoEvent(
+            **dict(zip(columns.event, row, strict=False)),
+            extra_info=ElCairoExtraInfo(*row[extra_start:]),
+        )
 
 
-def query(date_int_min: int, date_int_max: int, order: str) -> list[ElCairoEvent]:
-    """Execute query."""
+def query(
+    date_int_min: int,
+    date_int_max: int,
+    order: str,
+    columns: EventColumns | None = None,
+) -> Iterator[ElCairoEvent]:
+    """Execute query, the events are read as they are iterated."""
+    columns = columns or EventColumns()
+    order_field = (
+        EventModel.compare_date.asc()
+        if order == "ASC"
+        else EventModel.compare_date.desc()
+    )
+    rows: Select = (
+        select_events(columns)
+        .where(
+            EventModel.compare_date >= date_int_min,
+            EventModel.compare_date <= date_int_max,
+        )
+        .order_by(order_field)
+    )
     try:
-        order_field = EventModel.compare_date.asc() if order == "ASC" else EventModel.compare_date.desc()
-        rows = (
-            EventModel
-            .select()
-            .where(
-                EventModel.compare_date >= date_int_min,
-                EventModel.compare_date <= date_int_max,
-            )
-            .order_by(order_field)
+        yield from load_events(rows, columns)
+    except OperationalError as exc:
+        click.echo(f"Could not read the events: {exc}", err=True)
+
+
+def search_expression(text: str) -> str:
+    """
+    FTS5 query matching the events that contain every word of text, the
+    last characters of a word may be missing.
+    """
+    words: list[str] = [word.replace('"', '""') for word in text.split()]
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def search_available() -> bool:
+    """
+    Whether the database has the search index, it is missing if the SQLite
+    library that migrated it was built without FTS5.
+    """
+    return EventSearchModel.table_exists()
+
+
+def search(
+    text: str, limit: int, columns: EventColumns | None = None
+) -> Iterator[ElCairoEvent]:
+    """Events matching text, best ranked first."""
+    columns = columns or EventColumns()
+    expression: str = search_expression(text)
+    if not expression:
+        return
+
+    rows: Select = (
+        select_events(columns)
+        .join(
+            EventSearchModel,
+            on=(EventSearchModel.rowid == EventModel.event_id),
         )
-        return [
-            create_elcairo_event({
-                "name": row.name,
-                "date": row.date,
-                "synopsis": row.synopsis,
-                "cost": row.cost,
-                "image_url": row.image_url,
-                "image_path": row.image_path,
-                "url": row.url,
-                "direction": row.direction,
-                "cast": row.cast,
-                "genre": row.genre,
-                "duration": row.duration,
-                "origin": row.origin,
-                "year": row.year,
-                "age": row.age,
-            })
-            for row in rows
-        ]
-    except Exception:
-        return []
+        .where(EventSearchModel.match(expression))
+        .order_by(EventSearchModel.bm25())
+        .limit(limit)
+    )
+    try:
+        yield from load_events(rows, columns)
+    except OperationalError as exc:
+        click.echo(f"Could not read the events: {exc}", err=True)
 
 
 def db_init(obj: dict) -> None:
     """Initialize the database connection."""
-    script_dir: Path = Path(__file__).parent.resolve()
-    database_file: Path = script_dir / ".." / "elcairo.db"
+    data_dir: Path = settings.data_dir()
+    database_file: Path = data_dir / "elcairo.db"
 
     if not database_file.exists():
         click.echo("Create the database first!")
@@ -79,11 +178,27 @@ def db_init(obj: dict) -> None:
 
     db.init(database_file)
     db.connect()
+    if is_outdated():
+        db.close()
+        click.echo(OUTDATED_MESSAGE)
+        raise click.exceptions.Exit(1)
     click.get_current_context().call_on_close(db.close)
 
 
 def printer_init(obj: dict) -> None:
     """Initialize the printer given the click args passed."""
+    if obj["format"] != "text":
+        obj["printer"] = WRITERS[obj["format"]]()
+        obj["columns"] = EventColumns(event=EVENT_FIELDS)
+        return
+
+    render_cache: RenderCache | None = None
+    block_cache: BlockCache | None = None
+    if obj["render_cache"]:
+        data_dir: Path = settings.data_dir()
+        render_cache = RenderCache(data_dir / "render_cache")
+        block_cache = BlockCache(data_dir / "block_cache.db")
+
     obj["printer"] = ElCairoEventsPrinter(
         name=obj["name"],
         date=obj["date"],
@@ -94,7 +209,11 @@ def printer_init(obj: dict) -> None:
         url=obj["url"],
         separator=obj["separator"],
         image_renderer=obj["image_renderer"],
+        render_cache=render_cache,
+        stream=obj["stream"],
+        block_cache=block_cache,
     )
+    obj["columns"] = event_columns(obj)
 
 
 def next_sunday() -> arrow.Arrow:
@@ -0,0 +1,76 @@
+"""Serve command."""
+
+from pathlib import Path
+
+import click
+from halo import Halo
+
+import elcairo.settings as settings
+from elcairo.commands.lib.serve_functions import (
+    EventIndex,
+    EventsServer,
+    init_read_only,
+)
+from elcairo.migrations import OUTDATED_MESSAGE, is_outdated
+from elcairo.models import db
+
+
+@click.command()
+@click.option(
+    "-H",
+    "--host",
+    help="Address to listen on.",
+    default="127.0.0.1",
+    show_default=True,
+)
+@click.option(
+    "-p",
+    "--port",
+    help="Port to listen on.",
+    type=click.IntRange(min=0, max=65535),
+    default=8765,
+    show_default=True,
+)
+@click.option(
+    "-l",
+    "--access-log/--no-access-log",
+    help="Print every request.",
+    show_default=True,
+)
+def serve(host: str, port: int, access_log: bool) -> None:
+    """
+    Answer the events queries as JSON over HTTP.
+    The events are kept in memory and reloaded when the database changes.
+    """
+    database_file: Path = settings.data_dir() / "elcairo.db"
+    if not database_file.exists():
+        click.echo("Create the database first!")
+        raise click.exceptions.Exit(1)
+
+    init_read_only(database_file)
+    with db.connection_context():
+        outdated: bool = is_outdated()
+    if outdated:
+        click.echo(OUTDATED_MESSAGE)
+        raise click.exceptions.Exit(1)
+
+    spinner: Halo = Halo()
+    spinner.start("Loading the events")
+    index: EventIndex = EventIndex(database_file)
+    index.refresh()
+    spinner.succeed(f"Loaded {len(index.dates)} events")
+
+    try:
+        server: EventsServer = EventsServer((host, port), index, access_log)
+    except OSError as exc:
+        spinner.fail(f"Can't listen on {host}:{port}: {exc.strerror}")
+        raise click.exceptions.Exit(1) from exc
+
+    address_host, address_port = server.server_address[:2]
+    spinner.info(f"Serving on http://{address_host}:{address_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
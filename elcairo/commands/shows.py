@@ -2,13 +2,13 @@
 
 import datetime
 import sys
-from pathlib import Path
+from collections.abc import Iterator
 
 import arrow
 import click
 
 import elcairo.commands.lib.shows_functions as shows_functions
-from elcairo.api.elcairo import ElCairoEvent
+from elcairo.api.events import ElCairoEvent
 
 
 @click.group()
@@ -56,12 +56,34 @@ from elcairo.api.elcairo import ElCairoEvent
     "-R",
     "--image-renderer",
     type=click.Choice(
-        ["wezterm", "chafa", "catimg", "jp2a", "builtin"],
+        ["wezterm", "chafa", "catimg", "jp2a", "builtin", "builtin-color"],
         case_sensitive=False,
     ),
     default=None,
     help="Force a specific image renderer. [default: auto]",
 )
+@click.option(
+    "-c",
+    "--render-cache/--no-render-cache",
+    help="Reuse images and events already formatted by a previous run.",
+    default=True,
+    show_default=True,
+)
+@click.option(
+    "-S",
+    "--stream/--no-stream",
+    help="Write each event as soon as it is formatted.",
+    show_default=True,
+)
+@click.option(
+    "-f",
+    "--format",
+    "output_format",
+    type=click.Choice(["text", "json", "ndjson", "csv", "ics"], case_sensitive=False),
+    default="text",
+    show_default=True,
+    help="Output format, every format but text writes all the fields.",
+)
 @click.pass_obj
 def shows(
     obj: dict,
@@ -75,15 +97,12 @@ def shows(
     separator: bool,
     reverse: bool,
     image_renderer: str | None,
+    render_cache: bool,
+    stream: bool,
+    output_format: str,
 ):
     """Events printer."""
 
-    script_dir: Path = Path(__file__).parent.resolve()
-    lock_file: Path = script_dir / "db_lock_file"
-    if lock_file.exists():
-        click.echo("The database is being populated!")
-        raise click.exceptions.Exit(1)
-
     obj["name"] = name
     obj["date"] = date
     obj["image"] = image
@@ -96,6 +115,9 @@ def shows(
     if reverse:
         obj["order"] = "ASC"
     obj["image_renderer"] = image_renderer
+    obj["render_cache"] = render_cache
+    obj["stream"] = stream
+    obj["format"] = output_format.lower()
     shows_functions.db_init(obj)
     shows_functions.printer_init(obj)
 
@@ -105,10 +127,11 @@ def shows(
 def today(obj: dict) -> None:
     """Today's events."""
     now: arrow.Arrow = arrow.now()
-    events: list[ElCairoEvent] = shows_functions.query(
+    events: Iterator[ElCairoEvent] = shows_functions.query(
         date_int_min=shows_functions.day_start(now),
         date_int_max=shows_functions.day_end(now),
         order=obj["order"],
+        columns=obj["columns"],
     )
     obj["printer"].echo_list(events)
 
@@ -118,10 +141,11 @@ def today(obj: dict) -> None:
 def tomorrow(obj: dict) -> None:
     """Tomorrow's events."""
     tomorrow: arrow.Arrow = arrow.now().shift(days=1)
-    events: list[ElCairoEvent] = shows_functions.query(
+    events: Iterator[ElCairoEvent] = shows_functions.query(
         date_int_min=shows_functions.day_start(tomorrow),
         date_int_max=shows_functions.day_end(tomorrow),
         order=obj["order"],
+        columns=obj["columns"],
     )
     obj["printer"].echo_list(events)
 
@@ -130,10 +154,11 @@ def tomorrow(obj: dict) -> None:
 @click.pass_obj
 def week(obj: dict) -> None:
     """Events until next sunday."""
-    events: list[ElCairoEvent] = shows_functions.query(
+    events: Iterator[ElCairoEvent] = shows_functions.query(
         date_int_min=shows_functions.day_start(arrow.now()),
         date_int_max=shows_functions.day_end(shows_functions.next_sunday()),
         order=obj["order"],
+        columns=obj["columns"],
     )
     obj["printer"].echo_list(events)
 
@@ -143,10 +168,11 @@ def week(obj: dict) -> None:
 def weekend(obj: dict) -> None:
     """This weekend's events."""
 
-    events: list[ElCairoEvent] = shows_functions.query(
+    events: Iterator[ElCairoEvent] = shows_functions.query(
         date_int_min=shows_functions.day_start(shows_functions.next_saturday()),
         date_int_max=shows_functions.day_end(shows_functions.next_sunday()),
         order=obj["order"],
+        columns=obj["columns"],
     )
     obj["printer"].echo_list(events)
 
@@ -166,10 +192,11 @@ def day(obj: dict, date: datetime.datetime) -> None:
     month: str = str(date.month).zfill(2)
     day_date: str = str(date.day).zfill(2)
     date_arrow: arrow.Arrow = arrow.get(f"{year}-{month}-{day_date}")
-    events: list[ElCairoEvent] = shows_functions.query(
+    events: Iterator[ElCairoEvent] = shows_functions.query(
         date_int_min=shows_functions.day_start(date_arrow),
         date_int_max=shows_functions.day_end(date_arrow),
         order=obj["order"],
+        columns=obj["columns"],
     )
     obj["printer"].echo_list(events)
 
@@ -190,10 +217,11 @@ def until(obj: dict, date: datetime.datetime) -> None:
     month: str = str(date.month).zfill(2)
     day_date: str = str(date.day).zfill(2)
     date_arrow: arrow.Arrow = arrow.get(f"{year}-{month}-{day_date}")
-    events: list[ElCairoEvent] = shows_functions.query(
+    events: Iterator[ElCairoEvent] = shows_functions.query(
         date_int_min=shows_functions.day_start(arrow.now()),
         date_int_max=shows_functions.day_end(date_arrow),
         order=obj["order"],
+        columns=obj["columns"],
     )
     obj["printer"].echo_list(events)
 
@@ -202,9 +230,38 @@ def until(obj: dict, date: datetime.datetime) -> None:
 @click.pass_obj
 def upcoming(obj: dict) -> None:
     """Upcoming events."""
-    events: list[ElCairoEvent] = shows_functions.query(
+    events: Iterator[ElCairoEvent] = shows_functions.query(
         date_int_min=shows_functions.day_start(arrow.now()),
         date_int_max=sys.maxsize,
         order=obj["order"],
+        columns=obj["columns"],
+    )
+    obj["printer"].echo_list(events)
+
+
+@shows.command()
+@click.argument("text", nargs=-1, required=True)
+@click.option(
+    "-n",
+    "--limit",
+    help="Maximum number of events to print.",
+    type=click.IntRange(min=1),
+    default=20,
+    show_default=True,
+)
+@click.pass_obj
+def search(obj: dict, text: tuple[str, ...], limit: int) -> None:
+    """
+    Search events by name, synopsis, direction, cast and genre.
+    Events are printed best match first.
+    """
+    if not shows_functions.search_available():
+        click.echo("Searching needs an SQLite library built with FTS5.", err=True)
+        raise click.exceptions.Exit(1)
+
+    events: Iterator[ElCairoEvent] = shows_functions.search(
+        text=" ".join(text),
+        limit=limit,
+        columns=obj["columns"],
     )
     obj["printer"].echo_list(events)
@@ -1,15 +1,61 @@
 """Print El Cairo cinema events information."""
 
-import importlib.metadata
+import importlib
 
 import click
 
-from elcairo.commands.database import database
-from elcairo.commands.shows import shows
+# Subcommands are only imported when invoked: name -> (module:attribute, help)
+SUBCOMMANDS: dict[str, tuple[str, str]] = {
+    "database": ("elcairo.commands.database:database", "Database operations."),
+    "serve": ("elcairo.commands.serve:serve", "Events JSON server."),
+    "shows": ("elcairo.commands.shows:shows", "Events printer."),
+}
+
+
+class LazyGroup(click.Group):
+    """Group that imports the module of a subcommand when it is needed."""
+
+    def __init__(
+        self, *args, lazy_subcommands: dict[str, tuple[str, str]], **kwargs
+    ) -> None:
+        super().__init__(*args, **kwargs)
+        self.lazy_subcommands = lazy_subcommands
+
+    def list_commands(self, ctx: click.Context) -> list[str]:
+        return sorted([*super().list_commands(ctx), *self.lazy_subcommands])
+
+    def get_command(self, ctx: click.Context, cmd_name: str) -> click.Command | None:
+        if cmd_name not in self.lazy_subcommands:
+            return super().get_command(ctx, cmd_name)
+
+        import_path, _ = self.lazy_subcommands[cmd_name]
+        module_name, attribute = import_path.split(":")
+        command: click.Command = getattr(
+            importlib.import_module(module_name), attribute
+        )
+        self.add_command(command, cmd_name)
+        del self.lazy_subcommands[cmd_name]
+        return command
+
+    def format_commands(self, ctx: click.Context, formatter: click.HelpFormatter):
+        """List the subcommands in the help without importing them."""
+        rows: list[tuple[str, str]] = [
+            (name, short_help)
+            for name, (_, short_help) in self.lazy_subcommands.items()
+        ]
+        for name, command in self.commands.items():
+            if not command.hidden:
+                rows.append((name, command.get_short_help_str()))
+
+        if rows:
+            with formatter.section("Commands"):
+                formatter.write_dl(sorted(rows))
 
 
 def version() -> str:
     """Command line interface for El Cairo cinema."""
+    import importlib.metadata
+
     metadata = importlib.metadata.metadata("elcairo")
     project = metadata["Name"]
     author = metadata["author-email"]
@@ -17,14 +63,25 @@ def version() -> str:
     return f"{project} version {elcairo_version} by {author}"
 
 
-@click.group()
-@click.version_option(message=version())
-def elcairo():
-    """elcairo command group."""
+def print_version(ctx: click.Context, _param: click.Parameter, value: bool) -> None:
+    """Print the version, reading the package metadata only when asked."""
+    if not value or ctx.resilient_parsing:
+        return
+    click.echo(version())
+    ctx.exit()
 
 
-elcairo.add_command(database)
-elcairo.add_command(shows)
+@click.group(cls=LazyGroup, lazy_subcommands=dict(SUBCOMMANDS))
+@click.option(
+    "--version",
+    help="Show the version and exit.",
+    is_flag=True,
+    expose_value=False,
+    is_eager=True,
+    callback=print_version,
+)
+def elcairo():
+    """elcairo command group."""
 
 
 def main():
@@ -0,0 +1,117 @@
+"""Schema migrations of the events database."""
+
+from collections.abc import Callable
+
+from playhouse.migrate import SqliteMigrator, migrate
+
+from elcairo.models import ArchiveMonthModel, EventModel, EventSearchModel, db
+
+
+def add_content_hash() -> None:
+    """Column used by the incremental populate."""
+    columns: set[str] = {column.name for column in db.get_columns("events")}
+    if "content_hash" not in columns:
+        migrate(
+            SqliteMigrator(db).add_column(
+                "events", "content_hash", EventModel.content_hash
+            )
+        )
+
+
+def add_indexes() -> None:
+    """Indexes on compare_date, for the date range queries, and on name."""
+    EventModel._schema.create_indexes(safe=True)
+
+
+def add_archive_months() -> None:
+    """Checkpoints of the archive command."""
+    db.create_tables([ArchiveMonthModel], safe=True)
+
+
+SEARCH_COLUMNS = ("name", "synopsis", "direction", "cast", "genre")
+
+
+def add_search_index() -> None:
+    """
+    FTS5 index over the searchable columns of the events.
+    Triggers mirror every insert, update and delete of the events table so
+    populate and archive keep the index in sync.
+    Skipped if the SQLite library was built without FTS5.
+    """
+    if not EventSearchModel.fts5_installed():
+        return
+
+    EventSearchModel.create_table(safe=True)
+
+    columns: str = ", ".join(f'"{column}"' for column in SEARCH_COLUMNS)
+    new_values: str = ", ".join(f'new."{column}"' for column in SEARCH_COLUMNS)
+    old_values: str = ", ".join(f'old."{column}"' for column in SEARCH_COLUMNS)
+    insert_new: str = (
+        f"INSERT INTO events_search(rowid, {columns}) "
+        f"VALUES (new.event_id, {new_values});"
+    )
+    delete_old: str = (
+        f"INSERT INTO events_search(events_search, rowid, {columns}) "
+        f"VALUES ('delete', old.event_id, {old_values});"
+    )
+    triggers: dict[str, tuple[str, str]] = {
+        "events_search_insert": ("AFTER INSERT", insert_new),
+        "events_search_delete": ("AFTER DELETE", delete_old),
+        "events_search_update": ("AFTER UPDATE", f"{delete_old} {insert_new}"),
+    }
+    for name, (event, body) in triggers.items():
+        db.execute_sql(
+            f"CREATE TRIGGER IF NOT EXISTS {name} {event} ON events BEGIN {body} END"
+        )
+
+    EventSearchModel.rebuild()
+
+
+# Position i holds the migration that takes the schema to version i + 1.
+# Migrations must be safe to run on databases created with the current models.
+MIGRATIONS: list[Callable[[], None]] = [
+    add_content_hash,
+    add_indexes,
+    add_archive_months,
+    add_search_index,
+]
+SCHEMA_VERSION = len(MIGRATIONS)
+# Shown by the commands that only read the database, they never migrate it
+OUTDATED_MESSAGE = "The database is out of date, run: elcairo database migrate"
+
+
+def schema_version() -> int:
+    """Schema version of the connected database."""
+    return db.pragma("user_version")
+
+
+def is_outdated() -> bool:
+    """Whether the connected database has pending migrations."""
+    return schema_version() < SCHEMA_VERSION
+
+
+def migrate_database() -> int:
+    """
+    Create the tables if needed and apply the pending migrations.
+    Returns the number of migrations applied.
+    """
+    db.create_tables([EventModel, ArchiveMonthModel], safe=True)
+
+    current_version: int = schema_version()
+    if current_version >= SCHEMA_VERSION:
+        return 0
+
+    with db.atomic():
+        for migration in MIGRATIONS[current_version:]:
+            migration()
+        db.pragma("user_version", SCHEMA_VERSION)
+
+    return SCHEMA_VERSION - current_version
+
+
+def set_journal_mode(journal_mode: str) -> str:
+    """
+    Change the journal mode of the database file, returns the mode in use.
+    In "wal" mode readers don't block while the database is being written.
+    """
+    return db.pragma("journal_mode", journal_mode)
@@ -1,6 +1,7 @@
 """Peewee ORM models."""
 
 from peewee import AutoField, IntegerField, Model, SqliteDatabase, TextField
+from playhouse.sqlite_ext import FTS5Model, SearchField
 
 db = SqliteDatabase(None)
 
@@ -10,9 +11,9 @@ class EventModel(Model):
 
     event_id = AutoField()
     uid = TextField(unique=True)
-    name = TextField()
+    name = TextField(index=True)
     date = TextField()
-    compare_date = IntegerField()
+    compare_date = IntegerField(index=True)
     synopsis = TextField()
     direction = TextField()
     cast = TextField()
@@ -25,7 +26,39 @@ class EventModel(Model):
     image_path = TextField()
     image_url = TextField()
     url = TextField()
+    content_hash = TextField(default="")
 
     class Meta:
         database = db
         table_name = "events"
+
+
+class ArchiveMonthModel(Model):
+    """Months already stored by the archive command."""
+
+    month = TextField(primary_key=True)
+    events = IntegerField()
+    archived_at = TextField()
+
+    class Meta:
+        database = db
+        table_name = "archive_months"
+
+
+class EventSearchModel(FTS5Model):
+    """Full text index of the events table, kept in sync by triggers."""
+
+    name = SearchField()
+    synopsis = SearchField()
+    direction = SearchField()
+    cast = SearchField()
+    genre = SearchField()
+
+    class Meta:
+        database = db
+        table_name = "events_search"
+        options = {
+            "content": "events",
+            "content_rowid": "event_id",
+            "tokenize": "unicode61 remove_diacritics 2",
+        }
@@ -0,0 +1,23 @@
+"""Locations elcairo reads from and writes to."""
+
+import os
+from pathlib import Path
+
+DEFAULT_BASE_URL = "https://elcairocinepublico.gob.ar"
+
+
+def base_url() -> str:
+    """Root url of El Cairo's site, ELCAIRO_BASE_URL overrides it."""
+    return os.getenv("ELCAIRO_BASE_URL", DEFAULT_BASE_URL).rstrip("/")
+
+
+def data_dir() -> Path:
+    """
+    Directory of the database, the images and the caches, created if it
+    doesn't exist. ELCAIRO_DATA_DIR overrides it.
+    """
+    directory: Path = Path(
+        os.getenv("ELCAIRO_DATA_DIR") or Path(__file__).parent / "commands"
+    ).resolve()
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory
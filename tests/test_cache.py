@@ -0,0 +1,53 @@
+"""Tests of the on disk HTTP response cache."""
+
+import os
+from pathlib import Path
+
+from elcairo.api.cache import CacheEntry, HttpCache
+
+URL = "https://elcairocinepublico.gob.ar/cartelera-de-sala/2026-10/?ical=1"
+
+
+def make_older(directory: Path) -> None:
+    """Move the last use of every stored body ten seconds back."""
+    for body in directory.glob("*.body"):
+        mtime: float = body.stat().st_mtime - 10
+        os.utime(body, (mtime, mtime))
+
+
+def test_store_and_load(tmp_path: Path) -> None:
+    cache: HttpCache = HttpCache(tmp_path / "http_cache")
+    cache.store(CacheEntry(url=URL, body="Película".encode(), etag='"a"'))
+
+    entry: CacheEntry | None = cache.load(URL)
+
+    assert entry is not None
+    assert entry.text == "Película"
+    assert entry.conditional_headers() == {"If-None-Match": '"a"'}
+    assert cache.load(f"{URL}&other") is None
+
+
+def test_evicts_least_recently_used(tmp_path: Path) -> None:
+    directory: Path = tmp_path / "http_cache"
+    cache: HttpCache = HttpCache(directory, max_bytes=10)
+    cache.store(CacheEntry(url=f"{URL}&1", body=b"12345", etag='"1"'))
+    make_older(directory)
+    cache.store(CacheEntry(url=f"{URL}&2", body=b"12345", etag='"2"'))
+    make_older(directory)
+    cache.store(CacheEntry(url=f"{URL}&3", body=b"12345", etag='"3"'))
+
+    assert cache.load(f"{URL}&1") is None
+    assert cache.load(f"{URL}&2") is not None
+    assert cache.load(f"{URL}&3") is not None
+    assert cache.stats().size <= 10
+
+
+def test_store_failure_is_ignored(tmp_path: Path) -> None:
+    # The cache directory can't be created over a file
+    directory: Path = tmp_path / "http_cache"
+    directory.write_text("")
+    cache: HttpCache = HttpCache(directory)
+
+    cache.store(CacheEntry(url=URL, body=b"body", etag='"a"'))
+
+    assert cache.load(URL) is None
@@ -0,0 +1,138 @@
+"""Tests of the functions used in the database command."""
+
+from collections.abc import Iterator
+from pathlib import Path
+
+import arrow
+import icalendar
+import pytest
+
+from elcairo.api.elcairo import CalEvent
+from elcairo.commands.lib.database_functions import (
+    changed_events,
+    delete_missing_events,
+    image_file_path,
+    migrate_legacy_images,
+    upsert_events,
+)
+from elcairo.models import EventModel, db
+
+
+@pytest.fixture
+def database() -> Iterator[None]:
+    """An empty events table in memory."""
+    db.init(":memory:")
+    db.connect()
+    db.create_tables([EventModel])
+    yield
+    db.close()
+
+
+def event_row(**values: str | int) -> dict:
+    """Row of the events table, values replace the defaults."""
+    row: dict = {
+        "uid": "1@elcairocinepublico.gob.ar",
+        "name": "PELÍCULA",
+        "date": "2026-10-18T20:00:00-03:00",
+        "compare_date": 202610182000,
+        "synopsis": "Sinopsis.",
+        "direction": "Directora",
+        "cast": "Actriz, Actor",
+        "genre": "Drama",
+        "duration": "95 minutos",
+        "origin": "Argentina",
+        "year": "2024",
+        "age": "ATP",
+        "cost": "$ 3000",
+        "image_path": "",
+        "image_url": "",
+        "url": "https://elcairocinepublico.gob.ar/evento/pelicula/",
+        "content_hash": "a",
+    }
+    row.update(values)
+    return row
+
+
+def cal_event(uid: str, summary: str = "PELÍCULA") -> CalEvent:
+    """Calendar event with only a uid and a summary."""
+    component: icalendar.Event = icalendar.Event()
+    component.add("UID", uid)
+    component.add("SUMMARY", summary)
+    return CalEvent(component)
+
+
+def test_upsert_updates_changed_event(database: None) -> None:
+    upsert_events([event_row()])
+    event_id: int = EventModel.get(EventModel.uid == event_row()["uid"]).event_id
+
+    upsert_events(
+        [event_row(name="OTRA PELÍCULA", synopsis="Otra sinopsis.", content_hash="b")]
+    )
+
+    event: EventModel = EventModel.get(EventModel.uid == event_row()["uid"])
+    assert EventModel.select().count() == 1
+    assert event.event_id == event_id
+    assert (event.name, event.synopsis, event.content_hash) == (
+        "OTRA PELÍCULA",
+        "Otra sinopsis.",
+        "b",
+    )
+
+
+def test_upsert_inserts_new_event(database: None) -> None:
+    upsert_events([event_row()])
+    upsert_events([event_row(uid="2@elcairocinepublico.gob.ar")])
+
+    assert EventModel.select().count() == 2
+
+
+def test_migrate_legacy_images(database: None, tmp_path: Path) -> None:
+    image_url: str = "https://elcairocinepublico.gob.ar/poster.jpeg"
+    used: Path = tmp_path / "1@elcairocinepublico.gob.ar.jpeg"
+    unused: Path = tmp_path / "2@elcairocinepublico.gob.ar.jpeg"
+    used.write_bytes(b"poster")
+    unused.write_bytes(b"other poster")
+    upsert_events([event_row(image_url=image_url, image_path=str(used))])
+
+    assert migrate_legacy_images(tmp_path) == 2
+
+    new_path: Path = image_file_path(image_url, tmp_path)
+    assert EventModel.get().image_path == str(new_path)
+    assert new_path.read_bytes() == b"poster"
+    assert not used.exists()
+    assert not unused.exists()
+
+
+def test_changed_events(database: None) -> None:
+    stored: CalEvent = cal_event("1@elcairocinepublico.gob.ar")
+    changed: CalEvent = cal_event("2@elcairocinepublico.gob.ar")
+    upsert_events(
+        [
+            event_row(uid=stored.uid, content_hash=stored.content_hash),
+            event_row(uid=changed.uid, content_hash=changed.content_hash),
+        ]
+    )
+    new: CalEvent = cal_event("3@elcairocinepublico.gob.ar")
+    edited: CalEvent = cal_event(changed.uid, summary="OTRA PELÍCULA")
+
+    assert changed_events({stored, edited, new}) == {edited, new}
+
+
+def test_delete_missing_events(database: None) -> None:
+    upsert_events(
+        [
+            event_row(uid="1@elcairocinepublico.gob.ar", compare_date=202610172000),
+            event_row(uid="2@elcairocinepublico.gob.ar", compare_date=202610182000),
+            event_row(uid="3@elcairocinepublico.gob.ar", compare_date=202610192000),
+        ]
+    )
+
+    deleted: int = delete_missing_events(
+        {cal_event("3@elcairocinepublico.gob.ar")}, arrow.get("2026-10-18T00:00")
+    )
+
+    assert deleted == 1
+    assert [uid for (uid,) in EventModel.select(EventModel.uid).tuples()] == [
+        "1@elcairocinepublico.gob.ar",
+        "3@elcairocinepublico.gob.ar",
+    ]
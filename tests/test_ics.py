@@ -0,0 +1,58 @@
+"""Tests of the fast calendar extractor."""
+
+from pathlib import Path
+
+import icalendar
+import pytest
+
+from elcairo.api.elcairo import CalEvent
+from elcairo.api.ics import IcsFormatError, extract_events, parse_events
+from tests.utils.ics import FIXTURES_DIR, event_summary, fixture_paths, read_ics
+
+# SUMMARY values with escapes, written as in the calendar
+ESCAPED_SUMMARIES = (
+    r"Cine\, teatro\; música",
+    r"Primera línea\nsegunda\Ntercera",
+    r"C:\\new",
+    r"Barra\\\, coma",
+    r"Hora\: 20",
+    r"Termina en barra\\",
+)
+
+
+def summaries(components: list) -> dict[str, tuple]:
+    """Summary of every event by uid."""
+    return {
+        summary[0]: summary
+        for summary in (event_summary(CalEvent(component)) for component in components)
+    }
+
+
+@pytest.mark.parametrize("path", fixture_paths(), ids=lambda path: path.name)
+def test_parse_events_matches_icalendar(path: Path) -> None:
+    full: dict[str, tuple] = summaries(list(read_ics(path).walk("VEVENT")))
+    fast: dict[str, tuple] = summaries(parse_events(path.read_text()))
+
+    assert full
+    assert fast == full
+
+
+def test_binary_attachment_falls_back_to_icalendar() -> None:
+    text: str = (FIXTURES_DIR / "2026-01.ics").read_text()
+
+    with pytest.raises(IcsFormatError):
+        extract_events(text)
+    assert parse_events(text)
+
+
+@pytest.mark.parametrize("summary", ESCAPED_SUMMARIES)
+def test_extract_events_unescapes_like_icalendar(summary: str) -> None:
+    text: str = (
+        "BEGIN:VCALENDAR\r\nBEGIN:VEVENT\r\nUID:1@elcairocinepublico.gob.ar\r\n"
+        f"SUMMARY:{summary}\r\nEND:VEVENT\r\nEND:VCALENDAR\r\n"
+    )
+    full: dict[str, tuple] = summaries(
+        list(icalendar.Calendar.from_ical(text).walk("VEVENT"))
+    )
+
+    assert summaries(extract_events(text)) == full
@@ -0,0 +1,38 @@
+"""Tests of the targeted event page parser."""
+
+from pathlib import Path
+
+import pytest
+
+from elcairo.api.elcairo import ElCairo
+from elcairo.api.page import PageSections, extract_sections
+from tests.utils.html import EDGE_CASES, fixture_pages
+
+
+@pytest.fixture(scope="module")
+def elcairo() -> ElCairo:
+    return ElCairo()
+
+
+def targeted_scrape(html: str) -> dict:
+    """What scrape_event_page reads from a page with the targeted parser."""
+    sections: PageSections = extract_sections(html)
+    return {
+        "synopsis": sections.synopsis,
+        "cost": sections.cost,
+        "extra_info": ElCairo.extra_info_from_text(sections.extra_info),
+    }
+
+
+@pytest.mark.parametrize("path", fixture_pages(), ids=lambda path: path.name)
+def test_extract_sections_matches_soup(elcairo: ElCairo, path: Path) -> None:
+    html: str = path.read_text()
+    scraped: dict = targeted_scrape(html)
+
+    assert scraped["synopsis"]
+    assert scraped == elcairo.scrape_soup(html)
+
+
+@pytest.mark.parametrize("html", EDGE_CASES)
+def test_edge_case_matches_soup(elcairo: ElCairo, html: str) -> None:
+    assert targeted_scrape(html) == elcairo.scrape_soup(html)
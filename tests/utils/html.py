@@ -0,0 +1,90 @@
+"""Utilities for working with event pages in tests."""
+
+from pathlib import Path
+
+FIXTURES_DIR = Path(__file__).parent.parent / "fixtures"
+
+SYNTHETIC_PAGE = """<!DOCTYPE html>
+<html lang="es-AR">
+<head>
+<meta charset="UTF-8">
+<title>Película {movie} &#8211; El Cairo Cine Público</title>
+{head}
+</head>
+<body class="tribe_events-template-default single single-tribe_events">
+<header class="site-header"><nav>{navigation}</nav></header>
+<main id="main" class="site-main">
+<article class="tribe_events type-tribe_events">
+<h1 class="tribe-events-single-event-title">Película {movie}</h1>
+<div class="sinopsis-online">
+<h3>Sinopsis</h3>
+<p>Una película sobre el cine, la memoria &amp; la ciudad.<br>
+Restaurada en <em>4K</em> para su reestreno.</p>
+<p>Segundo párrafo que no forma parte de la sinopsis.</p>
+</div>
+<div class="informacion-entradas">
+<h3>Entradas</h3><p>$ 3000 &#8211; Jubilados $ 1500</p>
+</div>
+<div class="ficha-tecnica-online">
+<h3>Ficha técnica</h3>
+<p>DIRECCIÓN: Directora {movie}<br>
+ELENCO: Actriz, Actor<br>
+GÉNERO: Drama<br>
+DURACIÓN: 95 minutos<br>
+ORIGEN: Argentina<br>
+AÑO: 2024<br>
+CALIFICACIÓN: ATP</p>
+</div>
+</article>
+{related}
+</main>
+<footer class="site-footer">{footer}</footer>
+<script>window.tribe = {{"events": []}};</script>
+</body>
+</html>
+"""
+
+# Markup the parser has to nest exactly like BeautifulSoup does
+EDGE_CASES = (
+    '<div class="sinopsis-online"><p>a<p>b</div><p>c</p>',
+    '<div class="sinopsis-online"><p>a<i>b</p>c</i>d</div>',
+    '<div class="sinopsis-online"><p>a<script>x</script><style>y</style>b</p></div>',
+    '<div class="sinopsis-online">sin párrafo</div><div class="sinopsis-online">'
+    "<p>segunda</p></div>",
+    '<img class="informacion-entradas"><div class="informacion-entradas">'
+    "<p>$ 10</p></div>",
+    '<div class="otra informacion-entradas"><p>$ 1 &amp; &#8211; &euro;</p>',
+    '<div class="ficha-tecnica-online"><div class="sinopsis-online"><p>s</p></div>'
+    "DIRECCIÓN: X<br/>\nELENCO: Y</b></div>",
+    '<p class="sinopsis-online"><p>anidado</p></p>',
+    "<div>sin secciones</div>",
+    '<div class="ficha-tecnica-online">AÑO: 2020<![CDATA[x]]>',
+    '<div class="ficha-tecnica-online">A<br>  \n </br>\n\n<!-- c -->\n<pre> \n </pre>',
+    '<div class="informacion-entradas"><p>$ 5<img>  </img>  </b>\n</p></div>',
+)
+
+
+def fixture_pages() -> list[Path]:
+    """The recorded event pages, if there are any."""
+    return sorted(FIXTURES_DIR.glob("*.html"))
+
+
+def synthetic_page(movie: int = 1) -> str:
+    """An event page shaped like the ones of the site."""
+    head: str = "\n".join(
+        f'<link rel="stylesheet" href="/wp-content/style-{i}.css">'
+        f'<script src="/wp-content/script-{i}.js"></script>'
+        for i in range(30)
+    )
+    navigation: str = "".join(
+        f'<a class="menu-item" href="/seccion-{i}/">Sección {i}</a>' for i in range(40)
+    )
+    related: str = "".join(
+        f'<div class="related"><img src="/poster-{i}.jpg" alt="">'
+        f"<h4>Película {i}</h4><p>Próximamente</p></div>"
+        for i in range(60)
+    )
+    footer: str = "".join(f"<p>Enlace {i}</p>" for i in range(40))
+    return SYNTHETIC_PAGE.format(
+        movie=movie, head=head, navigation=navigation, related=related, footer=footer
+    )
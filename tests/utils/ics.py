@@ -4,8 +4,99 @@ from pathlib import Path
 
 import icalendar
 
+from elcairo.api.elcairo import CalEvent, ElCairo
+
+FIXTURES_DIR = Path(__file__).parent.parent / "fixtures"
+
+SYNTHETIC_HEADER = """BEGIN:VCALENDAR
+VERSION:2.0
+PRODID:-//El Cairo Cine Público - ECPv6.0//NONSGML v1.0//EN
+CALSCALE:GREGORIAN
+METHOD:PUBLISH
+X-WR-CALNAME:El Cairo Cine Público
+X-ORIGINAL-URL:https://elcairocinepublico.gob.ar
+X-WR-CALDESC:Eventos para El Cairo Cine Público
+BEGIN:VTIMEZONE
+TZID:America/Argentina/Buenos_Aires
+BEGIN:STANDARD
+TZOFFSETFROM:-0300
+TZOFFSETTO:-0300
+TZNAME:-03
+DTSTART:20250101T000000
+END:STANDARD
+END:VTIMEZONE
+"""
+
+SYNTHETIC_EVENT = """BEGIN:VEVENT
+DTSTART;TZID=America/Argentina/Buenos_Aires:{year}{month:02d}{day:02d}T{hour:02d}0000
+DTEND;TZID=America/Argentina/Buenos_Aires:{year}{month:02d}{day:02d}T{end:02d}0000
+DTSTAMP:20260101T120000
+CREATED:20251201T100000Z
+LAST-MODIFIED:20251215T100000Z
+UID:{uid}-{year}{month:02d}@elcairocinepublico.gob.ar
+SUMMARY:Película {movie}\\, versión restaurada
+DESCRIPTION:{description}
+URL:https://elcairocinepublico.gob.ar/evento/pelicula-{movie}/{year}-{month:02d}-{day:02d}/
+LOCATION:El Cairo Cine Público\\, Santa Fe 1120\\, Rosario\\, Argentina
+CATEGORIES:Cine,Estrenos
+ATTACH;FMTTYPE=image/jpeg:https://elcairocinepublico.gob.ar/wp-content/uploads/{year}/{month:02d}/pelicula-{movie}.jpg
+ORGANIZER;CN="El Cairo Cine Público":MAILTO:contacto@elcairocinepublico.gob.ar
+END:VEVENT
+"""
+
 
 def read_ics(path: str | Path) -> icalendar.Calendar:
     """Parse an .ics file and return the Calendar object."""
     with Path(path).open() as f:
         return icalendar.Calendar.from_ical(f.read())
+
+
+def event_summary(event: CalEvent) -> tuple:
+    """Everything elcairo reads from an event."""
+    return (
+        event.uid,
+        event.name,
+        event.begin,
+        event.url,
+        ElCairo.get_image(event.extra),
+        event.content_hash,
+    )
+
+
+def fixture_paths() -> list[Path]:
+    """The recorded .ics fixtures, if there are any."""
+    return sorted(FIXTURES_DIR.glob("*.ics"))
+
+
+def fold(line: str) -> str:
+    """Fold a content line at 75 characters."""
+    parts: list[str] = [line[:75]]
+    parts.extend(f" {line[i : i + 74]}" for i in range(75, len(line), 74))
+    return "\r\n".join(parts)
+
+
+def synthetic_month(events: int = 120, month: int = 1, year: int = 2026) -> str:
+    """
+    A calendar shaped like a monthly calendar of the site, each movie is
+    screened three times.
+    """
+    description: str = (
+        "Una película sobre el cine\\, la memoria y la ciudad. " * 12
+    ).strip()
+    body: list[str] = [SYNTHETIC_HEADER]
+    for index in range(events):
+        hour: int = 15 + index % 3 * 2
+        body.append(
+            SYNTHETIC_EVENT.format(
+                year=year,
+                month=month,
+                day=index % 28 + 1,
+                hour=hour,
+                end=hour + 2,
+                uid=10000 + index,
+                movie=index // 3,
+                description=description,
+            )
+        )
+    body.append("END:VCALENDAR\n")
+    return "\r\n".join(fold(line) for line in "".join(body).splitlines()) + "\r\n"